@@ -8,6 +8,7 @@ load_dotenv()
 # HuggingFace Tokenizers 병렬 처리 경고 끄기 (Deadlock 방지)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 from app import create_app
+from app import config
 
 # 앱 팩토리를 통해 앱 생성
 app = create_app()
@@ -22,4 +23,5 @@ if __name__ == "__main__":
     # app.run(host="0.0.0.0", port=port, debug=True)
 
     # 배포 -  app.run() 대신 serve() 사용
-    serve(app, host="0.0.0.0", port=port)
+    # 스레드 수는 admission lane 크기와 함께 맞춰야 하므로 설정값 사용 (기본 4개는 lane 대기열보다 작음)
+    serve(app, host="0.0.0.0", port=port, threads=config.WAITRESS_THREADS)
@@ -1,6 +1,7 @@
 import os
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import firebase_admin
 from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
@@ -9,9 +10,17 @@ from dotenv import load_dotenv
 from .services.nlp_service import NLPService
 from .services.music_service import MusicDataService
 from .services.image_service import ImageService
+from .services.search_service import LyricsSearchService
+from .services.quiz_service import QuizService
+from .services.lease_service import AnalysisLeaseService
+
+from .utils.admission import AdmissionController
+from .utils.profiler import SlowRequestSampler
+from . import config
 
 # 블루프린트 임포트
 from .controllers.quiz_controller import quiz_bp
+from .controllers.debug_controller import debug_bp
 
 # .env 로드
 load_dotenv()
@@ -23,6 +32,11 @@ def create_app():
     # CORS 설정 (모든 출처 허용)
     CORS(app)
 
+    # 프록시(Cloud Run 프런트엔드) 뒤에서 request.remote_addr가 실제 클라이언트 IP가 되도록 보정
+    # (클라이언트별 admission 할당량이 프록시 주소 하나로 합쳐지지 않게 함)
+    if config.TRUSTED_PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.TRUSTED_PROXY_HOPS)
+
     # 1. Firebase 초기화 (앱 컨텍스트 밖에서 한 번만 수행)
     try:
         if not firebase_admin._apps:
@@ -48,13 +62,59 @@ def create_app():
     # NLP 서비스 (모델 로딩 포함 - 시간이 조금 걸릴 수 있음)
     app.nlp_service = NLPService()
 
+    # 가사 검색 서비스 (n-gram 역색인)
+    app.search_service = LyricsSearchService(db_client=db)
+
     # Music 서비스 (Spotify, Genius 클라이언트 포함)
-    app.music_service = MusicDataService(db_client=db)
+    app.music_service = MusicDataService(
+        db_client=db,
+        search_service=app.search_service,
+        crawl_deadline=config.CRAWL_DEADLINE,
+        straggler_timeout=config.CRAWL_STRAGGLER_TIMEOUT,
+        batch_deadline=config.CRAWL_BATCH_DEADLINE,
+    )
+
+    # Quiz 서비스 (객관식 보기 구성)
+    app.quiz_service = QuizService(search_service=app.search_service)
+
+    # 분석 임대 서비스 (동시 /quizdata 요청의 Gemini 중복 분석 방지)
+    app.lease_service = AnalysisLeaseService(
+        db_client=db, wait_timeout=config.LEASE_WAIT_TIMEOUT
+    )
 
     # Image 서비스 (GCS 클라이언트 포함)
     app.image_service = ImageService()
 
+    # 동시 처리량 제한 (프로세스 전역, 모든 요청이 공유)
+    app.admission = AdmissionController(
+        {
+            "crawl": (
+                config.CRAWL_MAX_CONCURRENT,
+                config.CRAWL_MAX_QUEUE,
+                config.CRAWL_QUEUE_TIMEOUT,
+            ),
+            "analysis": (
+                config.ANALYSIS_MAX_CONCURRENT,
+                config.ANALYSIS_MAX_QUEUE,
+                config.ANALYSIS_QUEUE_TIMEOUT,
+            ),
+            "lease_wait": (config.LEASE_WAIT_MAX_CONCURRENT, 0, 0),
+        },
+        client_max_inflight=config.CLIENT_MAX_INFLIGHT,
+    )
+    # 대기 중인 요청도 waitress 스레드를 점유하므로, lane이 모든 스레드를 차지하지 못하게 검사
+    reserved = app.admission.reserved_threads()
+    if reserved >= config.WAITRESS_THREADS:
+        raise ValueError(
+            f"admission lanes reserve {reserved} threads, "
+            f"WAITRESS_THREADS({config.WAITRESS_THREADS}) must be larger"
+        )
+
+    # 느린 요청 스택 샘플러 (/debug/slow 에서 조회)
+    app.slow_sampler = SlowRequestSampler(threshold=config.SLOW_REQUEST_THRESHOLD)
+
     # 3. 블루프린트 등록 (라우팅 연결)
     app.register_blueprint(quiz_bp)
+    app.register_blueprint(debug_bp)
 
     return app
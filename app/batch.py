@@ -0,0 +1,339 @@
+"""
+오프라인 일괄 처리 CLI
+----------------------
+HTTP 엔드포인트를 거치지 않고 여러 곡/플레이리스트를 한 번에 처리합니다.
+차트 플레이리스트의 캐시(가사 정제, AI 분석, 워드클라우드)를 야간에 미리 채워 두는 용도입니다.
+
+사용 예:
+    # 플레이리스트 ID 목록(JSON 배열 파일 또는 직접 나열) 크롤링 + 서버 캐시 사전 적재
+    # (분석/워드클라우드는 서버와 같은 문서 필드·GCS 키에 저장되어 /quizdata, /wordcloud가 바로 재사용)
+    python -m app.batch playlists 37i9dQZF1DXcBWIGoYBM5M 37i9dQZEVXbNxXF4SkHj9F \
+        --analyze --wordcloud
+
+    # examples/playlist_lyrics_processed.json 형식의 곡 목록 처리
+    # (결과는 --output 파일에만 저장되며 서버가 읽는 캐시에는 반영되지 않음)
+    python -m app.batch songs examples/playlist_lyrics_processed.json \
+        --analyze --workers 4 --output out.json
+
+처리가 끝난 항목은 체크포인트 파일(JSON Lines)에 즉시 기록되므로,
+중단 후 같은 명령을 다시 실행하면 남은 항목만 이어서 처리합니다.
+플레이리스트는 크롤링이 complete 상태가 되어야 완료로 보며, 남은 곡은 다음 실행 때 resume_crawl로 이어서 수집합니다.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import concurrent.futures
+
+from dotenv import load_dotenv
+
+from app.services.lease_service import AnalysisLeaseService
+from app.services.music_service import MusicDataService
+from app.utils.lyrics_codec import decode_playlist
+from app.utils.text_utils import song_key, track_key
+
+load_dotenv()
+
+# 플레이리스트 하나에서 partial(취소된 곡 있음)로 끝났을 때 같은 실행 안에서 이어받는 횟수
+CRAWL_ATTEMPTS = 2
+
+# 워커 프로세스별 서비스 인스턴스 (initializer에서 1회 생성)
+_worker_nlp = None
+
+
+def _init_worker(analyze):
+    """워커 프로세스 시작 시 필요한 서비스만 생성 (곡마다 재생성하지 않음)"""
+    global _worker_nlp
+    if analyze:
+        from app.services.nlp_service import NLPService
+
+        _worker_nlp = NLPService()
+
+
+def _process_song(song):
+    """곡 하나에 대해 가사 정제 → (선택) AI 분석 (결과는 --output 파일용)"""
+    title = song.get("clean_title") or MusicDataService._clean_title(
+        song.get("original_title", "")
+    )
+    result = dict(song)
+    result["clean_title"] = title
+    result["lyrics"] = MusicDataService._clean_lyrics(song.get("lyrics", ""))
+
+    if _worker_nlp and result["lyrics"] and not song.get("summary"):
+        # summary, keywords, analysisRoute
+        result.update(_worker_nlp.analyze(result["lyrics"], title=title))
+
+    return result
+
+
+def _crawl_playlist(app, playlist_id, previous=None, analyze=False, wordcloud=False):
+    """
+    플레이리스트 하나를 크롤링하고, 백그라운드 수집까지 끝난 뒤 (선택) 분석/워드클라우드를 문서 캐시에 채운다.
+    이전 실행에서 끝내지 못한 문서(previous["doc_id"])는 새로 만들지 않고 resume_crawl로 이어서 수집한다.
+    반환값: {"playlist_id", "doc_id", "crawlStatus"} (crawlStatus가 complete일 때만 완료)
+    """
+    from app.controllers.quiz_controller import _id_generate
+
+    music_service = app.music_service
+    doc_id = (previous or {}).get("doc_id")
+    status = None
+    for _ in range(CRAWL_ATTEMPTS):
+        settled = threading.Event()
+        resumed = doc_id and music_service.resume_crawl(doc_id, on_settled=settled.set)
+        if not resumed:
+            # 첫 실행이거나 이전 문서가 없어진 경우 새로 크롤링
+            settled.clear()
+            doc_id = music_service.fetch_and_save_playlist(
+                playlist_id,
+                f"{playlist_id}_{_id_generate()}",
+                "batch",
+                on_settled=settled.set,
+            )
+            if not doc_id:
+                raise RuntimeError(f"playlist crawl failed: {playlist_id}")
+        # 응답 후에도 계속되는 백그라운드 수집이 끝나거나 취소될 때까지 대기
+        settled.wait()
+        doc_ref = app.db.collection("user_playlists").document(doc_id)
+        status = (doc_ref.get().to_dict() or {}).get("crawlStatus")
+        if status == "complete":
+            break
+
+    result = {"playlist_id": playlist_id, "doc_id": doc_id, "crawlStatus": status}
+    if status != "complete":
+        print(f"⚠️ [{playlist_id}] 크롤링 미완료({status}) — 다음 실행 때 이어서 수집")
+        return result
+
+    if analyze:
+        _analyze_playlist(app, doc_ref)
+    if wordcloud:
+        _prewarm_wordclouds(app, doc_ref)
+    return result
+
+
+def _analyze_playlist(app, doc_ref):
+    """서버와 같은 임대/병합 경로(AnalysisLeaseService)로 문서의 미분석 곡을 분석 (/quizdata가 그대로 재사용)"""
+    lease_service = app.lease_service
+    owner = f"batch-{uuid.uuid4()}"
+    playlist_data = lease_service.acquire(doc_ref, owner)
+    if playlist_data is None:
+        print(f"⏳ [{doc_ref.id}] 다른 요청이 분석 중이므로 건너뜁니다.")
+        return
+    try:
+        for song in playlist_data.get("tracks", []):
+            if not AnalysisLeaseService.needs_analysis(song):
+                continue
+            title = song.get("clean_title", song.get("original_title"))
+            analysis = app.nlp_service.analyze(song["lyrics"], title=title)
+            lease_service.merge_analysis(doc_ref, {track_key(song): analysis}, owner)
+    finally:
+        lease_service.release(doc_ref, owner)
+
+
+def _prewarm_wordclouds(app, doc_ref):
+    """/wordcloud와 같은 플레이리스트 가중치·GCS 키로 곡별 워드클라우드를 만들고 문서에 URL을 기록"""
+    from app.controllers.quiz_controller import _term_weights
+    from app.services.image_service import ImageService
+
+    playlist_data = decode_playlist(doc_ref.get().to_dict() or {})
+    updates = {}
+    with app.app_context():
+        for song in playlist_data.get("tracks", []):
+            if not song.get("lyrics"):
+                continue
+            title = song.get("clean_title", song.get("original_title"))
+            weights = _term_weights(
+                playlist_data, song, ImageService.DEFAULT_TOP_WORDS, updates
+            )
+            try:
+                url = app.image_service.generate_and_upload(
+                    song["lyrics"],
+                    title,
+                    song.get("artist", "Unknown"),
+                    weights=weights,
+                )
+            except Exception as e:
+                print(f"❌ [{title}] 워드클라우드 생성 실패: {e}")
+                continue
+            if url:
+                updates[f"wordcloudUrl.{track_key(song)}"] = url
+    if updates:
+        doc_ref.update(updates)
+
+
+def _load_checkpoint(path):
+    """체크포인트 파일에서 완료된 항목을 {key: result} 형태로 읽어옴"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 강제 종료로 마지막 줄이 잘린 경우 무시하고 다시 처리
+                continue
+            done[entry["key"]] = entry["result"]
+    return done
+
+
+def _load_playlist_ids(args):
+    ids = []
+    for value in args:
+        if os.path.exists(value):
+            with open(value, "r", encoding="utf-8") as f:
+                ids.extend(json.load(f))
+        else:
+            ids.append(value)
+    return ids
+
+
+def run(items, keys, submit, executor, checkpoint_path, is_done=None):
+    """
+    공통 실행 루프: 체크포인트에 없는(또는 is_done(result)가 거짓인) 항목만 풀에 제출하고, 완료 즉시 기록한다.
+    반환값: {key: result}
+    """
+    results = _load_checkpoint(checkpoint_path)
+    pending = [
+        (k, item)
+        for k, item in zip(keys, items)
+        if k not in results or (is_done and not is_done(results[k]))
+    ]
+    print(
+        f"📦 전체 {len(items)}개 / 완료 {len(items) - len(pending)}개 / 남은 {len(pending)}개"
+    )
+
+    start = time.time()
+    finished = failed = 0
+    with executor, open(checkpoint_path, "a", encoding="utf-8") as ckpt:
+        futures = {submit(item): key for key, item in pending}
+        for future in concurrent.futures.as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ [{key}] 처리 실패: {e}")
+                continue
+
+            results[key] = result
+            ckpt.write(json.dumps({"key": key, "result": result}, ensure_ascii=False))
+            ckpt.write("\n")
+            ckpt.flush()
+
+            finished += 1
+            elapsed = time.time() - start
+            print(
+                f"✅ {finished}/{len(pending)} ({finished / elapsed:.2f} items/sec)",
+                flush=True,
+            )
+
+    elapsed = time.time() - start
+    rate = finished / elapsed if elapsed > 0 else 0.0
+    print(
+        f"🏁 완료 {finished}개, 실패 {failed}개, {elapsed:.1f}s ({rate:.2f} items/sec)"
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch", description="LyrixMatch 오프라인 일괄 처리"
+    )
+    parser.add_argument("mode", choices=["songs", "playlists"])
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="songs: 곡 목록 JSON 파일 / playlists: 플레이리스트 ID 또는 ID 목록 JSON 파일",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument(
+        "--threads", action="store_true", help="프로세스 대신 스레드 풀 사용"
+    )
+    parser.add_argument(
+        "--analyze", action="store_true", help="Gemini 요약/키워드 분석"
+    )
+    parser.add_argument(
+        "--wordcloud",
+        action="store_true",
+        help="playlists 전용: 서버와 같은 키로 워드클라우드 생성 및 GCS 업로드",
+    )
+    parser.add_argument("--checkpoint", default="batch_checkpoint.jsonl")
+    parser.add_argument("--output", help="처리 결과를 저장할 JSON 파일")
+    args = parser.parse_args(argv)
+    if args.mode == "songs" and args.wordcloud:
+        # 플레이리스트 문서 없이 만든 이미지는 서버(/wordcloud)의 GCS 키와 달라 재사용되지 않음
+        parser.error("--wordcloud는 playlists 모드에서만 사용할 수 있습니다.")
+
+    if args.mode == "songs":
+        songs = []
+        for path in args.inputs:
+            with open(path, "r", encoding="utf-8") as f:
+                songs.extend(json.load(f))
+        keys = [
+            song_key(
+                s.get("clean_title") or s.get("original_title", ""), s.get("artist", "")
+            )
+            for s in songs
+        ]
+        pool_cls = (
+            concurrent.futures.ThreadPoolExecutor
+            if args.threads
+            else concurrent.futures.ProcessPoolExecutor
+        )
+        executor = pool_cls(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.analyze,),
+        )
+        results = run(
+            songs,
+            keys,
+            lambda song: executor.submit(_process_song, song),
+            executor,
+            args.checkpoint,
+        )
+        ordered = [results[k] for k in keys if k in results]
+    else:
+        # 크롤링은 네트워크 대기가 대부분이므로 스레드 풀 사용
+        # (플레이리스트 하나 안에서도 Genius 요청은 이미 병렬 처리됨)
+        from app import create_app
+
+        app = create_app()
+        playlist_ids = _load_playlist_ids(args.inputs)
+        # 미완료 플레이리스트는 이전 실행의 문서를 이어서 수집
+        previous = _load_checkpoint(args.checkpoint)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.workers)
+        results = run(
+            playlist_ids,
+            playlist_ids,
+            lambda pid: executor.submit(
+                _crawl_playlist,
+                app,
+                pid,
+                previous.get(pid),
+                args.analyze,
+                args.wordcloud,
+            ),
+            executor,
+            args.checkpoint,
+            is_done=lambda result: result.get("crawlStatus") == "complete",
+        )
+        ordered = [results[k] for k in playlist_ids if k in results]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(ordered, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
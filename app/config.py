@@ -0,0 +1,62 @@
+import os
+
+# ────────────────────────────────
+# 서버 (waitress)
+# 요청 처리 스레드 수: lane의 실행·대기 요청도 이 스레드를 점유하므로
+# 모든 lane의 (동시 실행 수 + 대기열 크기) 합은 이보다 작아야 함 (create_app에서 검사)
+WAITRESS_THREADS = int(os.environ.get("WAITRESS_THREADS", 16))
+# 앞단의 신뢰하는 프록시 수 (Cloud Run: Google Front End 1단)
+# X-Forwarded-For의 오른쪽에서 이 수만큼의 주소만 믿고 클라이언트 IP로 사용 (0이면 remote_addr 그대로)
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 1))
+
+# ────────────────────────────────
+# Admission Control (동시 처리량 제한)
+# lane별 (동시 실행 수, 대기열 크기, 대기 최대 시간(초))
+# crawl: 요청 하나가 Genius 스레드 10개를 쓰므로 동시 2건이면 외부 동시성은 최대 20
+CRAWL_MAX_CONCURRENT = int(os.environ.get("CRAWL_MAX_CONCURRENT", 2))
+CRAWL_MAX_QUEUE = int(os.environ.get("CRAWL_MAX_QUEUE", 2))
+CRAWL_QUEUE_TIMEOUT = float(os.environ.get("CRAWL_QUEUE_TIMEOUT", 30))
+
+# analysis: Gemini 분석이 필요한 /quizdata, /analyze
+ANALYSIS_MAX_CONCURRENT = int(os.environ.get("ANALYSIS_MAX_CONCURRENT", 4))
+ANALYSIS_MAX_QUEUE = int(os.environ.get("ANALYSIS_MAX_QUEUE", 4))
+ANALYSIS_QUEUE_TIMEOUT = float(os.environ.get("ANALYSIS_QUEUE_TIMEOUT", 20))
+
+# lease_wait: 다른 요청이 분석 중인 문서의 결과를 기다리는 요청 (대기열 없이 즉시 거절)
+# 최대 LEASE_WAIT_TIMEOUT초만 기다리고, 그래도 분석 중이면 202 + Retry-After로 응답
+LEASE_WAIT_MAX_CONCURRENT = int(os.environ.get("LEASE_WAIT_MAX_CONCURRENT", 2))
+LEASE_WAIT_TIMEOUT = float(os.environ.get("LEASE_WAIT_TIMEOUT", 15))
+
+# 크롤링 시간 예산(초): 초과 시 그때까지 수집한 곡만 먼저 저장하고 응답
+# 남은 곡은 백그라운드에서 최대 CRAWL_STRAGGLER_TIMEOUT초 동안 마저 수집해 문서에 추가
+CRAWL_DEADLINE = float(os.environ.get("CRAWL_DEADLINE", 40))
+CRAWL_STRAGGLER_TIMEOUT = float(os.environ.get("CRAWL_STRAGGLER_TIMEOUT", 120))
+# /crawl/batch: 한 번에 받을 최대 플레이리스트 수, 시간 예산(초)
+CRAWL_BATCH_MAX_PLAYLISTS = int(os.environ.get("CRAWL_BATCH_MAX_PLAYLISTS", 20))
+CRAWL_BATCH_DEADLINE = float(os.environ.get("CRAWL_BATCH_DEADLINE", 240))
+
+# 클라이언트 IP 하나가 lane별로 동시에 점유할 수 있는 요청 수
+CLIENT_MAX_INFLIGHT = int(os.environ.get("CLIENT_MAX_INFLIGHT", 1))
+
+# ────────────────────────────────
+# 진단용 프로파일러 (/debug/*)
+# DEBUG_TOKEN이 설정된 경우에만 활성화되며, 요청 헤더 X-Debug-Token으로 인증
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60))
+# 이 시간(초)을 넘긴 요청은 스택 샘플과 함께 기록
+SLOW_REQUEST_THRESHOLD = float(os.environ.get("SLOW_REQUEST_THRESHOLD", 3.0))
+
+# ────────────────────────────────
+# Gemini 분석 경로 라우팅 (NLPService)
+# 모델별 최근 p95 응답 시간이 SLO(초)를 넘으면 더 빠른 경로로 전환
+NLP_LATENCY_SLO = float(os.environ.get("NLP_LATENCY_SLO", 8.0))
+# 이 시간(초)보다 오래된 지연 표본은 버림 → SLO 초과로 제외된 모델도 표본이 만료되면 다시 시도됨
+NLP_LATENCY_MAX_AGE = float(os.environ.get("NLP_LATENCY_MAX_AGE", 300))
+NLP_FAST_MODEL = os.environ.get("NLP_FAST_MODEL", "gemini-2.5-flash-lite")
+NLP_QUALITY_MODEL = os.environ.get("NLP_QUALITY_MODEL", "gemini-2.5-flash")
+# 상위 모델의 사고(thinking) 토큰 예산: 사고 토큰도 max_output_tokens에 포함되므로 출력 상한에 더해 줌
+# (빠른 경로는 사고 비활성화 — thinking_budget=0을 지원하는 Flash 계열 모델 기준)
+NLP_QUALITY_THINKING_BUDGET = int(os.environ.get("NLP_QUALITY_THINKING_BUDGET", 1024))
+# 이보다 짧은 가사는 빠른 경로, 이 이상 긴 가사는 상위 모델 우선 (글자 수)
+NLP_SHORT_LYRICS_CHARS = int(os.environ.get("NLP_SHORT_LYRICS_CHARS", 600))
+NLP_LONG_LYRICS_CHARS = int(os.environ.get("NLP_LONG_LYRICS_CHARS", 2500))
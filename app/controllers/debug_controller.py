@@ -0,0 +1,74 @@
+import hmac
+
+from flask import Blueprint, request, jsonify, current_app, g, Response
+
+from app import config
+from app.utils.profiler import sample_all_threads, format_collapsed
+
+# 운영 인스턴스 진단용 엔드포인트 (DEBUG_TOKEN 미설정 시 비활성화)
+debug_bp = Blueprint("debug", __name__, url_prefix="/debug")
+
+
+def _authorized() -> bool:
+    """X-Debug-Token 헤더가 DEBUG_TOKEN 환경변수와 일치하는지 확인"""
+    token = config.DEBUG_TOKEN
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get("X-Debug-Token", ""), token)
+
+
+# ────────────────────────────────
+# 느린 요청 샘플러 훅 (모든 블루프린트의 요청에 적용)
+@debug_bp.before_app_request
+def _start_slow_sampler():
+    sampler = getattr(current_app, "slow_sampler", None)
+    if sampler:
+        sampler.start_request(request.endpoint or request.path)
+        g.slow_sampler_started = True
+
+
+@debug_bp.teardown_app_request
+def _end_slow_sampler(exc=None):
+    sampler = getattr(current_app, "slow_sampler", None)
+    if sampler and g.pop("slow_sampler_started", False):
+        sampler.end_request(status="error" if exc else "ok")
+
+
+# ────────────────────────────────
+
+
+@debug_bp.route("/profile", methods=["GET"])
+def profile():
+    """
+    N초 동안 모든 스레드의 스택을 샘플링하여 collapsed stack 텍스트로 반환
+    요청: /debug/profile?seconds=10&interval_ms=5 (헤더 X-Debug-Token 필수)
+    응답: "스레드;모듈:함수:줄;... 샘플수" (flamegraph.pl, speedscope 호환)
+    """
+    if not _authorized():
+        return jsonify({"error": "Not found"}), 404
+
+    seconds = request.args.get("seconds", default=10.0, type=float)
+    seconds = max(0.1, min(seconds, config.PROFILE_MAX_SECONDS))
+    interval_ms = request.args.get("interval_ms", default=5.0, type=float)
+    interval_ms = max(1.0, interval_ms)
+
+    stacks = sample_all_threads(seconds, interval=interval_ms / 1000)
+    return Response(format_collapsed(stacks) + "\n", mimetype="text/plain")
+
+
+@debug_bp.route("/slow", methods=["GET"])
+def slow_requests():
+    """threshold를 넘긴 최근 요청들의 엔드포인트, 처리 시간, 스택 샘플 반환"""
+    if not _authorized():
+        return jsonify({"error": "Not found"}), 404
+
+    sampler = current_app.slow_sampler
+    return (
+        jsonify(
+            {
+                "threshold_sec": sampler.threshold,
+                "requests": list(sampler.records),
+            }
+        ),
+        200,
+    )
@@ -1,9 +1,19 @@
 from datetime import datetime, timezone, timedelta
+import gzip
+import hashlib
+import math
 import uuid
 import re
 from flask import Blueprint, request, jsonify, current_app
 from firebase_admin import firestore
 
+from app import config
+from app.services.lease_service import AnalysisLeaseService
+from app.services.image_service import ImageService
+from app.utils.admission import AdmissionRejected
+from app.utils.lyrics_codec import decode_playlist
+from app.utils.text_utils import track_key
+
 
 # ────────────────────────────────
 # 헬퍼 함수: Firestore에서 특정 곡을 찾는 중복 코드를 하나의 함수로 통합
@@ -19,23 +29,238 @@ def _get_song_data_from_firestore(doc_id: str, song_title: str) -> dict:
         if not doc.exists:
             return None  # 문서 없음
 
-        playlist_data = doc.to_dict()
-        tracks = playlist_data.get("tracks", [])
-
-        for song in tracks:
-            # clean_title 또는 original_title과 일치하는지 확인 (유연성 확보)
-            if (song.get("clean_title") == song_title) or (
-                song.get("original_title") == song_title
-            ):
-                return song
-
-        return None  # 해당 곡을 찾지 못함
+        return _find_song(decode_playlist(doc.to_dict()), song_title)
 
     except Exception as e:
         print(f"Error in helper function: {e}")
         return None
 
 
+def _find_song(playlist_data: dict, song_title: str) -> dict:
+    """플레이리스트 문서 데이터에서 제목이 일치하는 곡을 찾아 반환 (없으면 None)"""
+    for song in playlist_data.get("tracks", []):
+        # clean_title 또는 original_title과 일치하는지 확인 (유연성 확보)
+        if (song.get("clean_title") == song_title) or (
+            song.get("original_title") == song_title
+        ):
+            return song
+
+    return None  # 해당 곡을 찾지 못함
+
+
+def _rejected_response(e: AdmissionRejected):
+    """과부하 거절(429/503) 또는 분석 진행 중(202) 응답 + Retry-After 헤더"""
+    response = jsonify({"error": e.reason, "retry_after": e.retry_after})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, e.status
+
+
+def _analyze_with_lease(doc_ref, playlist_data) -> dict:
+    """
+    분석되지 않은 곡을 Gemini로 분석합니다. (Lazy Analysis)
+    문서 단위 임대를 먼저 획득한 요청만 analysis lane 슬롯을 확보해 분석하고,
+    곡 하나가 끝날 때마다 결과를 트랜잭션으로 병합합니다.
+    다른 요청이 이미 분석 중이면 lease_wait lane 슬롯으로 최대 wait_timeout초만 그 결과를 기다렸다가 재사용합니다.
+    (Gemini 중복 호출 방지, 대기 요청이 waitress 스레드를 무한정 점유하지 않도록 제한)
+    반환값: 분석 결과가 반영된 최신 문서 데이터
+    (슬롯이 없으면 AdmissionRejected 429/503, 기다려도 분석 중이면 AdmissionRejected 202)
+    """
+    lease_service = current_app.lease_service
+    owner = str(uuid.uuid4())
+    waited = False
+
+    # 대기 후에도 남은 곡이 있으면(선점 요청이 중단/만료된 경우) 한 번 더 획득을 시도해 이어받음
+    for _ in range(2):
+        tracks = playlist_data.get("tracks", [])
+        if not any(AnalysisLeaseService.needs_analysis(s) for s in tracks):
+            break
+
+        acquired = lease_service.acquire(doc_ref, owner)
+        if acquired is None:
+            if waited:
+                # 한 번 기다린 뒤에도 분석 중 → 스레드를 더 잡지 않고 나중에 다시 요청하도록 응답
+                raise AdmissionRejected(
+                    202, math.ceil(config.LEASE_WAIT_TIMEOUT), "analysis in progress"
+                )
+            print(
+                f"⏳ [Lease] 다른 요청이 분석 중입니다. 결과를 기다립니다: {doc_ref.id}"
+            )
+            with current_app.admission.admit("lease_wait", request.remote_addr):
+                playlist_data = lease_service.wait_for_release(doc_ref)
+            waited = True
+            continue
+
+        try:
+            # 임대 획득 시점의 문서로 다시 계산 (조회 후 획득 전에 다른 요청이 분석을 끝냈을 수 있음)
+            playlist_data = acquired
+            pending = [
+                s
+                for s in playlist_data.get("tracks", [])
+                if AnalysisLeaseService.needs_analysis(s)
+            ]
+            if pending:
+                with current_app.admission.admit("analysis", request.remote_addr):
+                    _analyze_pending(doc_ref, pending, owner)
+        finally:
+            lease_service.release(doc_ref, owner)
+        break
+
+    return playlist_data
+
+
+def _analyze_pending(doc_ref, pending, owner):
+    """임대를 보유한 상태에서 곡별로 분석하고 결과를 즉시 병합"""
+    for song in pending:
+        title = song.get("clean_title", song.get("original_title"))
+        try:
+            # 분석 결과와 함께 사용된 경로(모델)도 저장 (analysisRoute)
+            analysis = current_app.nlp_service.analyze(song["lyrics"], title=title)
+        except Exception as e:
+            print(f"❌ [Quizdata Error] '{title}' 분석 실패: {e}")
+            continue
+        song.update(analysis)
+        # 곡 단위로 즉시 병합 → 대기 중인 요청도 완료된 곡부터 확인 가능
+        current_app.lease_service.merge_analysis(
+            doc_ref, {track_key(song): analysis}, owner
+        )
+
+
+def _ensure_analyzed(doc_ref, playlist_data) -> dict:
+    """
+    분석이 필요한 곡이 있으면 분석(또는 다른 요청의 분석 완료 대기) 후 최신 문서 데이터를 반환
+    (이미 분석된 문서는 제한 없이 그대로 반환, analysis lane 슬롯은 임대 획득 후에만 사용)
+    """
+    tracks = playlist_data.get("tracks", [])
+    if any(AnalysisLeaseService.needs_analysis(song) for song in tracks):
+        playlist_data = _analyze_with_lease(doc_ref, playlist_data)
+    return playlist_data
+
+
+def _build_quiz(playlist_data, n_choices=0, use_catalog=False):
+    """
+    분석된 플레이리스트 문서 데이터로 퀴즈 문항 리스트를 구성합니다.
+    반환값: (quiz_result, answered_songs, updates)
+    - answered_songs: quiz_result와 같은 순서의 원본 트랙
+    - updates: 문서에 캐시할 필드 (choiceCache 등)
+    """
+    quiz_result = []
+    answered_songs = []  # quiz_result와 같은 순서의 원본 트랙 (보기 구성용)
+    failed_songs = []  # 실패한 곡을 추적하기 위한 리스트
+    updates = {}  # 문서에 캐시할 필드 (호출 측에서 한 번에 갱신)
+
+    # 트랙 순회하며 결과 구성
+    for song in playlist_data.get("tracks", []):
+        try:
+            title = song.get("clean_title", song.get("original_title"))
+            artist = song.get("artist")
+            lyrics = song.get("lyrics", "")
+            if not lyrics.strip():
+                print(f"Skipping song {song.get('clean_title')} due to empty lyrics.")
+                continue
+
+            # 퀴즈 결과 리스트에 추가 (기존 앱이 기대하는 필드 포함)
+            if song.get("summary") and song.get("keywords"):
+                quiz_result.append(
+                    {
+                        "title": title,
+                        "artist": artist,
+                        "summary": song["summary"],
+                        "keywords": song["keywords"],
+                        "lyrics": lyrics,
+                    }
+                )
+                answered_songs.append(song)
+            else:
+                # 가사는 있으나 모델 분석에 실패한 경우 (또는 다른 요청의 분석 대기 시간 초과)
+                failed_songs.append(song.get("clean_title"))
+                print(
+                    f"⚠️  Skipping song '{song.get('clean_title')}' due to analysis failure (empty result)."
+                )
+        except Exception as e:
+            # --- [Robustness] 예상치 못한 오류 발생 시 ---
+            # (예: song 딕셔너리 포맷이 깨진 경우)
+            failed_songs.append(song.get("clean_title", "Unknown Title"))
+            print(
+                f"❌  [Quizdata Error] Critical error processing song. Skipping. Error: {e}"
+            )
+            continue  # 이 곡을 건너뛰고 다음 곡으로 계속 진행
+
+    # 객관식 보기 구성 (유사도 행렬과 카탈로그 보충 후보는 플레이리스트 문서에 캐시)
+    if n_choices >= 2 and quiz_result:
+        quiz_service = current_app.quiz_service
+        neighbors, choice_cache = quiz_service.get_neighbors(
+            playlist_data, answered_songs
+        )
+        cache = choice_cache or dict(playlist_data.get("choiceCache") or {})
+        catalog = dict(cache.get("catalog") or {})
+        for item, song in zip(quiz_result, answered_songs):
+            item["choices"] = quiz_service.build_choices(
+                song, neighbors, n_choices, use_catalog=use_catalog, catalog=catalog
+            )
+        if choice_cache is not None or catalog != (cache.get("catalog") or {}):
+            updates["choiceCache"] = dict(cache, catalog=catalog)
+
+    return quiz_result, answered_songs, updates
+
+
+def _term_weights(playlist_data, song, top_n, updates) -> list:
+    """
+    곡의 특징 단어 가중치 [[단어, 가중치], ...]를 반환합니다. (플레이리스트 내 TF-IDF)
+    문서의 termWeights 캐시를 우선 사용하고, 캐시가 없거나 곡 구성이 바뀌었으면(증분 크롤링)
+    플레이리스트 전체 곡을 한 번에 다시 계산하여 updates에 추가합니다.
+    termWeights = {"signature": 곡 구성 해시, "top": 곡당 단어 수, "songs": {track_key: [[단어, 가중치], ...]}}
+    """
+    tracks = [t for t in playlist_data.get("tracks", []) if t.get("lyrics")]
+    signature = hashlib.sha1(
+        "\n".join(sorted(track_key(t) for t in tracks)).encode("utf-8")
+    ).hexdigest()[:16]
+
+    cached = playlist_data.get("termWeights") or {}
+    if cached.get("signature") != signature or cached.get("top", 0) < top_n:
+        # 요청보다 넉넉하게 계산해 두어 top 변경 시에도 재사용
+        cache_n = max(top_n, ImageService.DEFAULT_TOP_WORDS)
+        weights = current_app.image_service.playlist_term_weights(tracks, top_n=cache_n)
+        cached = {
+            "signature": signature,
+            "top": cache_n,
+            "songs": {track_key(t): w for t, w in zip(tracks, weights)},
+        }
+        # 같은 요청의 다음 곡은 방금 계산한 결과를 재사용
+        playlist_data["termWeights"] = cached
+        updates["termWeights"] = cached
+        if "wordFreq" in playlist_data:
+            # termWeights로 대체된 곡별 단어 빈도 캐시 제거 (문서 1MB 한도)
+            playlist_data.pop("wordFreq")
+            updates["wordFreq"] = firestore.DELETE_FIELD
+
+    return (cached["songs"].get(track_key(song)) or [])[:top_n]
+
+
+def _crawl_with_slot(client_ip, crawl, *args, **kwargs):
+    """
+    crawl lane 슬롯을 확보하고 크롤링을 실행합니다. (슬롯이 없으면 AdmissionRejected)
+    시간 예산을 넘겨 응답한 뒤에도 남은 곡은 백그라운드에서 Genius를 계속 호출하므로,
+    슬롯은 응답 시점이 아니라 수집이 모두 끝나거나 취소될 때(on_settled) 반납합니다.
+    """
+    release = current_app.admission.hold("crawl", client_ip)
+    try:
+        return crawl(*args, on_settled=release, **kwargs)
+    except Exception:
+        release()  # 여러 번 호출해도 한 번만 반납
+        raise
+
+
+def _compressed_json(payload, status=200):
+    """클라이언트가 gzip을 지원하면(Accept-Encoding) 압축된 JSON 응답을 반환"""
+    response = jsonify(payload)
+    response.status_code = status
+    if "gzip" in request.headers.get("Accept-Encoding", "").lower():
+        response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
 # ────────────────────────────────
 
 
@@ -63,6 +288,15 @@ def _id_generate():
     return id_postfix
 
 
+def _extract_playlist_id(playlist_url):
+    """
+    Spotify 플레이리스트 URL에서 Playlist ID 추출 (형식이 다르면 None)
+    예: https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=...
+    """
+    match = re.search(r"playlist/([a-zA-Z0-9]+)", playlist_url or "")
+    return match.group(1) if match else None
+
+
 # 기존 앱과의 호환성을 위해 url_prefix='' 설정 (루트 경로 사용)
 quiz_bp = Blueprint("quiz", __name__, url_prefix="")
 
@@ -91,24 +325,25 @@ def crawl_playlist():
         return jsonify({"error": "Missing 'playlist_url'"}), 400
 
     # 1. URL에서 Playlist ID 추출 (정규식 사용)
-    # 예: https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=...
-    match = re.search(r"playlist/([a-zA-Z0-9]+)", playlist_url)
-    if match:
-        playlist_id = match.group(1)
-    else:
+    playlist_id = _extract_playlist_id(playlist_url)
+    if not playlist_id:
         return jsonify({"error": "잘못된 Spotify 플레이리스트 URL입니다."}), 400
 
     # Request ID 생성
     id_postfix = _id_generate()
     request_id = f"{playlist_id}_{id_postfix}"
+    # 프록시 뒤의 실제 클라이언트 IP (create_app의 ProxyFix가 X-Forwarded-For로 보정)
     client_ip = request.remote_addr
-    # 프록시 환경을 고려한 실제 IP 확인 방법
-    # client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
 
     try:
+        # 동시 크롤링 수 제한 (초과 시 즉시 429/503)
         # MusicDataService 호출 (current_app을 통해 접근)
-        result_id = current_app.music_service.fetch_and_save_playlist(
-            playlist_id, request_id, client_ip
+        result_id = _crawl_with_slot(
+            client_ip,
+            current_app.music_service.fetch_and_save_playlist,
+            playlist_id,
+            request_id,
+            client_ip,
         )
 
         if result_id:
@@ -117,6 +352,105 @@ def crawl_playlist():
         else:
             return jsonify({"error": "Failed to fetch playlist"}), 500
 
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@quiz_bp.route("/crawl/batch", methods=["POST"])
+def crawl_playlists_batch():
+    """
+    여러 Spotify 플레이리스트를 한 번에 수집 (퀴즈 팩 사전 적재용)
+    플레이리스트 간 중복 곡은 Spotify 트랙 ID 기준으로 한 번만 수집하고, 플레이리스트마다 문서를 하나씩 생성
+    요청 Body: {"playlist_urls": ["https://open.spotify.com/playlist/...", ...]}
+    응답: {"results": [{"playlist_url", "doc_id"}, ...], "totalTracks": N, "uniqueTracks": M}
+    """
+    data = request.get_json(silent=True) or {}
+    playlist_urls = data.get("playlist_urls")
+    if not isinstance(playlist_urls, list) or not playlist_urls:
+        return jsonify({"error": "Missing 'playlist_urls'"}), 400
+    if len(playlist_urls) > config.CRAWL_BATCH_MAX_PLAYLISTS:
+        return (
+            jsonify(
+                {
+                    "error": f"최대 {config.CRAWL_BATCH_MAX_PLAYLISTS}개의 플레이리스트까지 요청할 수 있습니다."
+                }
+            ),
+            400,
+        )
+
+    playlist_ids = {url: _extract_playlist_id(url) for url in playlist_urls}
+    invalid = [url for url, playlist_id in playlist_ids.items() if not playlist_id]
+    if invalid:
+        return (
+            jsonify(
+                {"error": "잘못된 Spotify 플레이리스트 URL입니다.", "invalid": invalid}
+            ),
+            400,
+        )
+
+    # 같은 플레이리스트가 여러 번 들어와도 문서는 하나만 생성
+    requests_by_playlist = {
+        playlist_id: f"{playlist_id}_{_id_generate()}"
+        for playlist_id in dict.fromkeys(playlist_ids.values())
+    }
+    client_ip = request.remote_addr
+
+    try:
+        # 공유 스레드풀 하나로 수집하므로 crawl lane 슬롯 하나만 점유
+        result = _crawl_with_slot(
+            client_ip,
+            current_app.music_service.fetch_and_save_playlists,
+            requests_by_playlist,
+            client_ip,
+        )
+
+        docs = result["docs"]
+        results = [
+            {"playlist_url": url, "doc_id": docs.get(playlist_ids[url])}
+            for url in playlist_urls
+        ]
+        status = 200 if any(docs.values()) else 500
+        return (
+            jsonify(
+                {
+                    "results": results,
+                    "totalTracks": result["totalTracks"],
+                    "uniqueTracks": result["uniqueTracks"],
+                }
+            ),
+            status,
+        )
+
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@quiz_bp.route("/crawl/resume/<string:doc_id>", methods=["POST"])
+def resume_crawl(doc_id):
+    """
+    중단된 크롤링을 이어서 수행 (이미 저장된 곡은 다시 수집하지 않음)
+    요청 Body(선택): {"retry_failed": true} → 가사를 찾지 못한 곡도 재시도
+    응답: {"doc_id": "..."}
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result_id = _crawl_with_slot(
+            request.remote_addr,
+            current_app.music_service.resume_crawl,
+            doc_id,
+            retry_failed=bool(data.get("retry_failed")),
+        )
+
+        if result_id:
+            return jsonify({"doc_id": result_id}), 200
+        return jsonify({"error": "Resumable crawl not found"}), 404
+
+    except AdmissionRejected as e:
+        return _rejected_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -127,8 +461,14 @@ def get_quizdata(doc_id):
     Firestore 문서 ID를 기반으로 퀴즈 데이터를 생성하여 반환한다. (NLP 분석 수행)
     기존 앱은 이 API를 호출할 때 분석 결과를 기대함.
     따라서 여기서 NLP 분석이 안 되어 있다면 즉시 수행해야 함.
+
+    선택 파라미터:
+    - choices=N : 문항마다 N개의 객관식 보기(정답 포함)를 "choices" 필드로 추가
+    - catalog=true : 플레이리스트 곡만으로 보기가 부족하면 전체 카탈로그에서 보충
     """
     db = current_app.db
+    n_choices = request.args.get("choices", default=0, type=int)
+    use_catalog = request.args.get("catalog", "false").lower() == "true"
     try:
         doc_ref = db.collection("user_playlists").document(doc_id)
         doc = doc_ref.get()
@@ -136,72 +476,17 @@ def get_quizdata(doc_id):
         if not doc.exists:
             return jsonify({"error": "Document not found"}), 404
 
-        playlist_data = doc.to_dict()
-        tracks = playlist_data.get("tracks", [])
+        playlist_data = _ensure_analyzed(doc_ref, decode_playlist(doc.to_dict()))
+        quiz_result, _, updates = _build_quiz(playlist_data, n_choices, use_catalog)
 
-        quiz_result = []
-        failed_songs = []  # 실패한 곡을 추적하기 위한 리스트
-        needs_update = False
-
-        # 트랙 순회하며 분석 및 결과 구성
-        for song in tracks:
-            try:
-                title = song.get("clean_title", song.get("original_title"))
-                artist = song.get("artist")
-                lyrics = song.get("lyrics", "")
-                if not lyrics.strip():
-                    print(
-                        f"Skipping song {song.get('clean_title')} due to empty lyrics."
-                    )
-                    continue
-
-                # 분석된 데이터가 없으면 지금 분석 수행 (Lazy Analysis)
-                if "summary" not in song or not song["summary"]:
-                    summary, keywords = current_app.nlp_service.process_lyrics(
-                        lyrics, title=title
-                    )
-                    song["summary"] = summary
-                    song["keywords"] = keywords
-                    needs_update = True  # DB 업데이트 필요 표시
-
-                # 퀴즈 결과 리스트에 추가 (기존 앱이 기대하는 필드 포함)
-                if song.get("summary") and song.get("keywords"):
-                    quiz_result.append(
-                        {
-                            "title": title,
-                            "artist": artist,
-                            "summary": song["summary"],
-                            "keywords": song["keywords"],
-                            "lyrics": lyrics,
-                        }
-                    )
-                else:
-                    # 가사는 있으나 모델 분석에 실패한 경우
-                    failed_songs.append(song.get("clean_title"))
-                    print(
-                        f"⚠️  Skipping song '{song.get('clean_title')}' due to analysis failure (empty result)."
-                    )
-            except:
-                # --- [Robustness] 예상치 못한 오류 발생 시 ---
-                # (예: song 딕셔너리 포맷이 깨진 경우)
-                failed_songs.append(song.get("clean_title", "Unknown Title"))
-                print(
-                    f"❌  [Quizdata Error] Critical error processing song. Skipping. Error: {e}"
-                )
-                continue  # 이 곡을 건너뛰고 다음 곡으로 계속 진행
-
-        # 분석을 새로 수행했다면 DB에 저장 (다음 요청을 빠르게 하기 위함)
-        if needs_update:
-            doc_ref.update(
-                {
-                    "tracks": tracks,
-                    "status": "analyzed",
-                    "analyzedAt": firestore.SERVER_TIMESTAMP,
-                }
-            )
+        # 분석 결과(tracks)와 별개 필드만 갱신하므로 다른 요청의 쓰기를 덮어쓰지 않음
+        if updates:
+            doc_ref.update(updates)
 
         return jsonify(quiz_result), 200
 
+    except AdmissionRejected as e:
+        return _rejected_response(e)
     except Exception as e:
         print(f"Quizdata 생성 중 외부 오류: {e}")
         return jsonify({"Quizdata error": str(e)}), 500
@@ -213,8 +498,11 @@ def get_wordcloud(doc_id, song_title):
     Firestore에서 특정 곡의 정보를 가져와 워드클라우드를 생성하고 URL을 반환
     """
     try:
-        # 1. 헬퍼 함수를 사용해 곡 데이터 조회
-        song = _get_song_data_from_firestore(doc_id, song_title)
+        # 1. 곡 데이터 조회 (특징 단어 가중치 계산에 플레이리스트 전체가 필요)
+        doc_ref = current_app.db.collection("user_playlists").document(doc_id)
+        doc = doc_ref.get()
+        playlist_data = decode_playlist(doc.to_dict()) if doc.exists else {}
+        song = _find_song(playlist_data, song_title)
 
         if not song:
             return jsonify({"error": "Song not found"}), 404
@@ -222,11 +510,23 @@ def get_wordcloud(doc_id, song_title):
         lyrics = song.get("lyrics", "")
         artist = song.get("artist", "Unknown")
 
-        # 2. ImageService 호출
+        # 2. 플레이리스트 TF-IDF 가중치로 ImageService 호출
+        updates = {}
+        weights = _term_weights(
+            playlist_data, song, ImageService.DEFAULT_TOP_WORDS, updates
+        )
         wc_url = current_app.image_service.generate_and_upload(
-            lyrics, song_title, artist
+            lyrics, song_title, artist, weights=weights
         )
 
+        if wc_url:
+            # 생성된 URL을 문서에 기록 → /quizbundle에서 GCS 조회 없이 재사용
+            updates[f"wordcloudUrl.{track_key(song)}"] = wc_url
+        if updates:
+            try:
+                doc_ref.update(updates)
+            except Exception as e:
+                print(f"⚠️ [Wordcloud] 캐시 기록 실패: {e}")
         if wc_url:
             return jsonify({"wordcloud_url": wc_url}), 200
         else:
@@ -236,6 +536,42 @@ def get_wordcloud(doc_id, song_title):
         return jsonify({"error": str(e)}), 500
 
 
+@quiz_bp.route("/wordcloud/<string:doc_id>/<string:song_title>/data", methods=["GET"])
+def get_wordcloud_data(doc_id, song_title):
+    """
+    워드클라우드를 서버에서 그리지 않고, 클라이언트 렌더링용 단어 가중치 데이터를 반환
+    요청: /wordcloud/<doc_id>/<title>/data?top=50&mask=true
+    응답: {"title": ..., "words": [["단어", 가중치], ...], "mask": {...}}
+    가중치는 플레이리스트 내 TF-IDF (다른 곡에도 흔한 단어는 낮게), 문서의 termWeights 필드에 캐시
+    """
+    top_n = max(1, min(request.args.get("top", default=50, type=int), 200))
+    with_mask = request.args.get("mask", "false").lower() == "true"
+
+    try:
+        doc_ref = current_app.db.collection("user_playlists").document(doc_id)
+        doc = doc_ref.get()
+        if not doc.exists:
+            return jsonify({"error": "Document not found"}), 404
+
+        playlist_data = decode_playlist(doc.to_dict())
+        song = _find_song(playlist_data, song_title)
+        if not song:
+            return jsonify({"error": "Song not found"}), 404
+
+        updates = {}
+        words = _term_weights(playlist_data, song, top_n, updates)
+        if updates:
+            doc_ref.update(updates)
+
+        result = {"title": song_title, "words": words}
+        if with_mask:
+            result["mask"] = current_app.image_service.mask_metadata()
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @quiz_bp.route("/analyze/<string:doc_id>/<string:song_title>", methods=["GET"])
 def analyze_single_song(doc_id, song_title):
     """
@@ -249,10 +585,89 @@ def analyze_single_song(doc_id, song_title):
             return jsonify({"error": "Song not found"}), 404
 
         # 2. NLP 서비스 호출 (이미 분석된 경우 DB값을 쓸 수도 있지만, 여기선 강제 분석 로직 유지)
-        summary, keywords = current_app.nlp_service.process_lyrics(
-            track["lyrics"], song_title
-        )
+        with current_app.admission.admit("analysis", request.remote_addr):
+            summary, keywords = current_app.nlp_service.process_lyrics(
+                track["lyrics"], song_title
+            )
         return jsonify({"summary": summary, "keywords": keywords})
 
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@quiz_bp.route("/quizbundle/<string:doc_id>", methods=["GET"])
+def get_quizbundle(doc_id):
+    """
+    퀴즈 세션 시작에 필요한 데이터를 한 번에 반환 (모바일 오프라인 플레이용)
+    문서 1회 조회로 /quizdata 문항 + 곡별 힌트(워드클라우드)를 구성하고, gzip으로 압축해 응답
+    - 이미 생성된 워드클라우드가 있으면 hint.wordcloud_url
+    - 없으면 클라이언트 렌더링용 hint.words ([[단어, 가중치], ...], 문서에 캐시)
+
+    선택 파라미터:
+    - choices=N (기본 4), catalog=true : /quizdata와 동일
+    - top=N : 힌트 단어 수 (기본 50)
+    - mask=true : 클라이언트 렌더링용 마스크 메타데이터 포함
+    """
+    n_choices = request.args.get("choices", default=4, type=int)
+    use_catalog = request.args.get("catalog", "false").lower() == "true"
+    top_n = max(1, min(request.args.get("top", default=50, type=int), 200))
+    with_mask = request.args.get("mask", "false").lower() == "true"
+
+    try:
+        doc_ref = current_app.db.collection("user_playlists").document(doc_id)
+        doc = doc_ref.get()
+        if not doc.exists:
+            return jsonify({"error": "Document not found"}), 404
+
+        playlist_data = _ensure_analyzed(doc_ref, decode_playlist(doc.to_dict()))
+        quiz_result, answered_songs, updates = _build_quiz(
+            playlist_data, n_choices, use_catalog
+        )
+
+        wordcloud_urls = playlist_data.get("wordcloudUrl") or {}
+        for item, song in zip(quiz_result, answered_songs):
+            url = wordcloud_urls.get(track_key(song))
+            if url:
+                item["hint"] = {"wordcloud_url": url}
+            else:
+                item["hint"] = {
+                    "words": _term_weights(playlist_data, song, top_n, updates)
+                }
+
+        # choiceCache, termWeights 캐시를 한 번의 쓰기로 저장
+        if updates:
+            doc_ref.update(updates)
+
+        bundle = {"doc_id": doc_id, "quiz": quiz_result}
+        if with_mask:
+            bundle["mask"] = current_app.image_service.mask_metadata()
+        return _compressed_json(bundle)
+
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        print(f"Quizbundle 생성 중 외부 오류: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@quiz_bp.route("/search", methods=["GET"])
+def search_lyrics():
+    """
+    가사 조각으로 곡을 검색 (n-gram 역색인 사용)
+    요청: /search?q=오빤 강남 스타일&limit=10
+    응답: {"query": "...", "results": [{"title", "artist", "score"}, ...]}
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing 'q'"}), 400
+
+    limit = request.args.get("limit", default=10, type=int)
+    limit = max(1, min(limit, 50))
+
+    try:
+        results = current_app.search_service.search(query, limit=limit)
+        return jsonify({"query": query, "results": results}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,150 @@
+import re
+
+import lyricsgenius
+from lyricsgenius.types import Song
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+from app.utils.text_utils import name_variants, name_similarity
+
+# lxml이 설치되어 있으면 C 파서 사용 (html.parser 대비 수 배 빠름)
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Genius 가사 본문 컨테이너만 파싱 대상으로 지정 (스크립트/광고/댓글 등은 트리로 만들지 않음)
+LYRICS_STRAINER = SoupStrainer("div", attrs={"data-lyrics-container": "true"})
+# 마크업이 바뀐 경우를 위한 lyricsgenius 기본 선택자
+LEGACY_CLASS_RE = re.compile(r"^Lyrics-\w{2}.\w+.[1]|Lyrics__Container")
+_BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+
+# 검색 결과 후보 점수 = 제목 유사도 * TITLE_WEIGHT + 가수 유사도 * (1 - TITLE_WEIGHT)
+TITLE_WEIGHT = 0.6
+# 이 점수 미만이면 엉뚱한 곡으로 보고 가사를 가져오지 않음
+MIN_MATCH_SCORE = 0.6
+# 가수 유사도가 이 값 미만이면 제목이 같아도 다른 곡으로 봄 (동명곡: "Stay" - Justin Bieber vs BLACKPINK)
+MIN_ARTIST_SCORE = 0.5
+# 번역/로마자 표기 페이지("Genius English Translations", "Genius Romanizations" 등)는 원곡보다 후순위
+TRANSLATION_ARTIST_RE = re.compile(r"^Genius\b", re.IGNORECASE)
+TRANSLATION_PENALTY = 0.5
+
+
+def score_hit(hit, title_variants, artist_variants) -> float:
+    """Genius 검색 결과(hit["result"]) 하나가 찾는 곡과 얼마나 일치하는지 점수화 (0~1)"""
+    if hit.get("lyrics_state") != "complete" or hit.get("instrumental"):
+        return 0.0
+    hit_titles = name_variants(hit.get("title", "")) | name_variants(
+        hit.get("title_with_featured", "")
+    )
+    primary = (hit.get("primary_artist") or {}).get("name", "")
+    hit_artists = name_variants(primary) | name_variants(hit.get("artist_names", ""))
+
+    artist_score = name_similarity(artist_variants, hit_artists)
+    if artist_score < MIN_ARTIST_SCORE:
+        return 0.0
+    score = (
+        TITLE_WEIGHT * name_similarity(title_variants, hit_titles)
+        + (1 - TITLE_WEIGHT) * artist_score
+    )
+    if TRANSLATION_ARTIST_RE.match(primary):
+        score *= TRANSLATION_PENALTY
+    return score
+
+
+def best_hit(hits, titles, artists):
+    """
+    검색 결과 중 제목/가수 표기 후보 전체와 가장 잘 맞는 곡을 반환 (MIN_MATCH_SCORE 미만이면 None)
+    titles, artists: 정제 전/후 제목, 원본/확장 가수 등 비교할 표기 목록
+    """
+    title_variants = set().union(*(name_variants(t) for t in titles if t))
+    artist_variants = set().union(*(name_variants(a) for a in artists if a))
+    scored = [(score_hit(h, title_variants, artist_variants), h) for h in hits]
+    score, hit = max(scored, key=lambda x: x[0], default=(0.0, None))
+    return hit if score >= MIN_MATCH_SCORE else None
+
+
+class PooledGenius(lyricsgenius.Genius):
+    """
+    PooledGenius 클래스
+    -------------------
+    크롤링 스레드들이 공유하는 lyricsgenius.Genius 확장 클라이언트입니다.
+
+    - requests 기본 커넥션 풀(10)은 워커 수와 무관하게 고정되어 있어, 스레드가 늘면 연결을 버리고 새로 맺음
+      → 워커 수에 맞춘 keep-alive 풀을 http/https 어댑터에 장착 (PROXY_URL 사용 시 프록시 연결 풀에도 동일 적용)
+    - 가사 페이지 전체를 html.parser로 파싱하던 방식 대신, 가사 컨테이너만 lxml로 파싱
+    - 검색어 조합마다 search_song(검색 + 페이지 스크래핑)을 반복하던 방식 대신,
+      검색 API를 한 번 호출하고 결과를 로컬에서 점수화하여 가장 잘 맞는 곡의 페이지만 가져옴 (find_song)
+    """
+
+    def __init__(self, *args, pool_size=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        # pool_block=True: 풀 크기 이상으로 연결을 만들지 않고 반납을 기다림 (Genius 동시 연결 수 상한)
+        adapter = HTTPAdapter(
+            pool_connections=2, pool_maxsize=pool_size, pool_block=True
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def find_song(self, titles, artists, per_page=10):
+        """
+        곡 하나당 검색 1회 + 가사 페이지 1회로 가사를 가져옵니다.
+        titles, artists: 비교할 제목/가수 표기 목록 (첫 번째 제목 + 첫 번째 가수를 검색어로 사용)
+        반환값: lyricsgenius Song 객체 (적합한 결과나 가사가 없으면 None)
+        """
+        query = f"{titles[0]} {artists[0]}".strip()
+        response = self.search_songs(query, per_page=per_page)
+        hits = [
+            h["result"] for h in response.get("hits", []) if h.get("type") == "song"
+        ]
+
+        hit = best_hit(hits, titles, artists)
+        if hit is None:
+            return None
+        lyrics = self.lyrics(song_url=hit["url"])
+        if not lyrics:
+            return None
+        return Song(self, hit, lyrics)
+
+    def lyrics(self, song_id=None, song_url=None, remove_section_headers=False):
+        """Genius 곡 페이지에서 가사를 추출합니다. (lyricsgenius.Genius.lyrics와 동일한 인터페이스)"""
+        if song_url:
+            path = song_url.replace("https://genius.com/", "")
+        elif song_id:
+            path = self.song(song_id)["song"]["path"][1:]
+        else:
+            raise ValueError("You must supply either `song_id` or `song_url`.")
+
+        html = self._make_request(path, web=True)
+        lyrics = self.extract_lyrics(
+            html, self.remove_section_headers or remove_section_headers
+        )
+        if lyrics is None and self.verbose:
+            print(
+                f"Couldn't find the lyrics section. Song URL: https://genius.com/{path}"
+            )
+        return lyrics
+
+    @staticmethod
+    def extract_lyrics(html, remove_section_headers=False):
+        """가사 페이지 HTML에서 가사 컨테이너의 텍스트만 추출합니다. (없으면 None)"""
+        html = _BR_RE.sub("\n", html)
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=LYRICS_STRAINER)
+        divs = soup.find_all("div", attrs={"data-lyrics-container": "true"})
+
+        if not divs:
+            # 컨테이너 속성이 없는 구버전 마크업: 전체 파싱 후 클래스명으로 탐색
+            soup = BeautifulSoup(html, HTML_PARSER)
+            divs = soup.find_all("div", class_=LEGACY_CLASS_RE)
+            if not divs:
+                return None
+
+        lyrics = "\n".join(div.get_text() for div in divs)
+
+        # [Verse], [Bridge] 등 섹션 헤더 제거
+        if remove_section_headers:
+            lyrics = re.sub(r"(\[.*?\])*", "", lyrics)
+            lyrics = re.sub("\n{2}", "\n", lyrics)
+        return lyrics.strip("\n")
@@ -1,19 +1,20 @@
 import os
 import io
 import re
+import json
+import hashlib
+from collections import Counter
 from dotenv import load_dotenv
 
 from google.cloud import storage
 import matplotlib.pyplot as plt
 from PIL import Image
 
-# multidict는 동일한 키에 여러 값을 저장할 수 있는 딕셔너리 구조를 제공합니다.
-import multidict as multidict
-
 # ImageColorGenerator: 이미지 색상 추출
 import numpy as np
 from wordcloud import WordCloud, STOPWORDS, ImageColorGenerator
 
+from app.utils.korean_normalizer import normalize_korean
 
 # .env 파일 로드
 load_dotenv()
@@ -21,6 +22,54 @@ load_dotenv()
 # --- 기본 설정 ---
 plt.rcParams["axes.unicode_minus"] = False  # 마이너스 기호 깨짐 방지
 
+# 워드클라우드 마스크 크기 및 사전 계산 에셋 파일명
+MASK_SIZE = (800, 800)
+MASK_ASSET_NAME = "mask_800.npy"
+# 클라이언트 렌더링용 마스크 메타데이터 해상도 (grid x grid 셀)
+MASK_GRID = 32
+# 워드클라우드에 배치하는 최대 단어 수 (서버 렌더링 max_words와 동일)
+DEFAULT_TOP_WORDS = 50
+# 빈도 집계 전 제거할 문장 부호 (아포스트로피 제외)
+_PUNCT_RE = re.compile(r"[^\w\s']")
+
+
+def build_mask_asset(mask_path, asset_path, size=MASK_SIZE):
+    """
+    마스크 PNG를 리사이징하여 NumPy 배열(.npy)로 저장합니다.
+    임시 파일에 쓴 뒤 교체하므로, 동시에 시작한 다른 프로세스가 쓰다 만 파일을 읽지 않습니다.
+    """
+    with Image.open(mask_path) as original:
+        # LANCZOS는 고품질 리사이징 필터
+        resized = original.resize(size, Image.Resampling.LANCZOS)
+        mask = np.array(resized)
+
+    tmp_path = f"{asset_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, mask)
+    os.replace(tmp_path, asset_path)
+    return asset_path
+
+
+def load_mask_asset(mask_path, asset_path):
+    """
+    사전 계산된 마스크 배열을 읽기 전용 메모리 맵(mmap)으로 엽니다.
+    에셋이 없거나 원본 PNG보다 오래되었으면 먼저 생성합니다.
+    """
+    stale = not os.path.exists(asset_path) or (
+        os.path.exists(mask_path)
+        and os.path.getmtime(mask_path) > os.path.getmtime(asset_path)
+    )
+    if stale:
+        try:
+            build_mask_asset(mask_path, asset_path)
+        except OSError as e:
+            # 읽기 전용 파일 시스템 등: 메모리에서 직접 계산
+            print(f"⚠️ 마스크 에셋 저장 실패, 메모리에서 생성합니다: {e}")
+            with Image.open(mask_path) as original:
+                return np.array(original.resize(MASK_SIZE, Image.Resampling.LANCZOS))
+
+    return np.load(asset_path, mmap_mode="r")
+
 
 class ImageService:
     """
@@ -31,6 +80,8 @@ class ImageService:
     마스크 이미지와 한글 폰트를 사용하여 커스텀된 워드클라우드를 생성합니다.
     """
 
+    DEFAULT_TOP_WORDS = DEFAULT_TOP_WORDS
+
     def __init__(self, bucket_name=os.getenv("GCS_BUCKET_NAME")):
         self.bucket_name = bucket_name
 
@@ -47,18 +98,16 @@ class ImageService:
 
         # 마스크 이미지 위치: app/static/mask_image.png (존재한다면)
         self.mask_path = os.path.join(base_dir, "app", "static", "mask_image.png")
+        # 리사이징이 끝난 마스크 배열 (빌드 시점에 미리 생성: python -m app.services.image_service)
+        self.mask_asset_path = os.path.join(base_dir, "app", "static", MASK_ASSET_NAME)
 
-        # 마스크 이미지를 Pillow로 열기
-        self.mask_image_orginal = Image.open(self.mask_path)
-        # 원하는 크기로 리사이징
-        new_size = (800, 800)
-        self.resized_mask_image = self.mask_image_orginal.resize(
-            new_size, Image.Resampling.LANCZOS
-        )  # LANCZOS는 고품질 리사이징 필터
-        # 리사이징된 이미지를 numpy 배열로 변환하여 마스크로 사용
-        self.mask = np.array(self.resized_mask_image)
+        # 읽기 전용 메모리 맵으로 로드 → 여러 워커 프로세스가 같은 물리 메모리(페이지 캐시)를 공유
+        # 원본/리사이징 PIL 이미지는 보관하지 않음
+        self.mask = load_mask_asset(self.mask_path, self.mask_asset_path)
         # 단어 클라우드의 각 단어가 배치된 위치에 따라, 이미지의 색상을 추출해 단어에 적용
+        # (ImageColorGenerator는 배열을 복사하지 않고 참조만 하므로 메모리 맵을 그대로 공유)
         self.image_colors = ImageColorGenerator(self.mask)
+        self._mask_metadata = {}  # grid -> mask_metadata() 결과 캐시
 
         # GCS 클라이언트
         try:
@@ -127,34 +176,132 @@ class ImageService:
 
         return lyrics_processed
 
+    @staticmethod
+    def _tokens(processed_lyrics) -> list:
+        """전처리된 가사를 집계용 단어 리스트로 분리 (소문자화 + 한국어 조사/어미 제거)"""
+        # "사랑을", "사랑해" → "사랑" (normalize_korean은 lru_cache로 단어당 한 번만 계산)
+        words = _PUNCT_RE.sub(" ", processed_lyrics).lower().split()
+        return [normalize_korean(word) for word in words]
+
     def _getFrequencyDict(self, lyrics):
-        """전처리된 가사를 받아 단어별 빈도 수를 집계하여 multidict.MultiDict 형태로 반환합니다."""
-
-        # 1) 문장부호 중 아포스트로피를 제외한 나머지를 공백으로 대체
-        #    [^\w\s'] 는 영숫자(\w), 공백(\s), 그리고 ' 만 허용하겠다는 뜻입니다.
-        lyrics = re.sub(r"[^\w\s']", " ", lyrics)
-
-        # fullTermsDict: multidict.MultiDict() 구조로 변환하여 반환합니다.
-        # 이는 동일한 키에 여러 값을 저장할 수 있습니다.
-        fullTermsDict = multidict.MultiDict()
-        # tmpDict: 단순히 단어와 그 빈도를 저장하는 임시 딕셔너리입니다.
-        tmpDict = {}
-
-        # 2) 공백 기준으로 분리
-        for text in lyrics.split():
-            # 3) 소문자화 후 빈도 집계
-            word = text.lower()
-            # tmpDict.get(text, 0): tmpDict 딕셔너리에서 현재까지 text의 빈도(key)를 반환합니다.
-            # 소문자로 변환된 단어의 빈도를 계산하여 tmpDict에 저장합니다.
-            tmpDict[word] = tmpDict.get(word, 0) + 1
-
-        # 5) multidict에 추가
-        fullTermsDict = multidict.MultiDict(tmpDict)
-        return fullTermsDict
-
-    def generate_and_upload(self, lyrics, title, artist):
+        """전처리된 가사를 받아 단어별 빈도 수를 집계하여 dict로 반환합니다."""
+        return dict(Counter(self._tokens(lyrics)))
+
+    def playlist_term_weights(self, tracks, top_n=DEFAULT_TOP_WORDS) -> list:
+        """
+        플레이리스트 전체 곡의 곡별 특징 단어 가중치를 한 번에 계산합니다.
+        모든 곡을 한 번씩만 토큰화해 공유 어휘를 만들고, 곡 x 단어 희소 행렬(COO: 행/열/빈도 배열)에서
+        TF-IDF를 벡터 연산으로 구합니다. 플레이리스트의 모든 곡에 흔한 단어(감탄사, 후렴 등)는 가중치가 낮아집니다.
+        반환값: tracks와 같은 순서의 [[단어, 가중치], ...] 리스트 (가중치 내림차순, 최대 top_n개)
+        """
+        docs = [
+            self._tokens(
+                self._preprocess_lyrics(
+                    t.get("lyrics", ""),
+                    t.get("clean_title") or t.get("original_title", ""),
+                    t.get("artist", ""),
+                )
+            )
+            for t in tracks
+        ]
+        n = len(docs)
+        lengths = np.fromiter(map(len, docs), dtype=np.int64, count=n)
+        if not lengths.sum():
+            return [[] for _ in tracks]
+
+        # 공유 어휘 (사전순 정렬) 및 토큰별 단어 ID
+        vocab, term_ids = np.unique(
+            np.array([w for doc in docs for w in doc]), return_inverse=True
+        )
+        size = len(vocab)
+        doc_ids = np.repeat(np.arange(n), lengths)
+
+        # (곡, 단어) 쌍별 빈도 → COO 희소 행렬
+        cells, counts = np.unique(doc_ids * size + term_ids, return_counts=True)
+        rows, cols = np.divmod(cells, size)
+
+        # TF-IDF (QuizService.similarity_matrix와 같은 smooth idf)
+        df = np.bincount(cols, minlength=size)
+        idf = np.log((1 + n) / (1 + df)) + 1.0
+        weights = counts * idf[cols]
+
+        # 곡별 가중치 내림차순 (동점은 단어 사전순)
+        order = np.lexsort((cols, -weights, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        bounds = np.searchsorted(rows, np.arange(n + 1))
+
+        return [
+            [
+                [str(vocab[c]), round(float(w), 3)]
+                for c, w in zip(
+                    cols[start : min(start + top_n, end)],
+                    weights[start : min(start + top_n, end)],
+                )
+            ]
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def mask_metadata(self, grid=MASK_GRID) -> dict:
+        """
+        클라이언트가 같은 모양/색으로 렌더링할 수 있도록 마스크를 grid x grid 셀로 축소한 메타데이터
+        - shape: 각 행을 "1"(단어 배치 가능) / "0"(배경) 문자열로 표현
+        - colors: 셀별 평균 색상 (#rrggbb, 배경 셀은 null)
+        마스크는 고정 에셋이므로 grid별로 한 번 계산한 뒤 재사용합니다.
+        흑백(2차원) 마스크는 회색조 색상으로, RGBA 마스크는 알파 채널을 제외하고 계산합니다.
+        """
+        if grid not in self._mask_metadata:
+            h, w = self.mask.shape[:2]
+            if not 1 <= grid <= min(h, w):
+                raise ValueError(f"grid는 1 이상 {min(h, w)} 이하여야 합니다: {grid}")
+            ch, cw = h // grid, w // grid
+            cells = np.asarray(self.mask[: ch * grid, : cw * grid], dtype=np.float32)
+            if cells.ndim == 2:
+                cells = np.repeat(cells[..., np.newaxis], 3, axis=-1)
+            cells = cells[..., :3].reshape(grid, ch, grid, cw, 3)
+            # 흰색(255) 픽셀은 WordCloud 마스크에서 배경으로 취급됨
+            drawable = (cells < 255).any(axis=-1).mean(axis=(1, 3)) >= 0.5
+            colors = cells.mean(axis=(1, 3)).round().astype(int)
+            self._mask_metadata[grid] = {
+                "width": w,
+                "height": h,
+                "grid": grid,
+                "shape": ["".join("1" if v else "0" for v in row) for row in drawable],
+                "colors": [
+                    [
+                        (
+                            "#%02x%02x%02x" % tuple(colors[y, x])
+                            if drawable[y, x]
+                            else None
+                        )
+                        for x in range(grid)
+                    ]
+                    for y in range(grid)
+                ],
+            }
+        return self._mask_metadata[grid]
+
+    def render_png(self, freq_dict) -> bytes:
+        """단어 빈도로 워드클라우드를 배치하고 PNG 바이트로 인코딩합니다."""
+        wc = WordCloud(
+            font_path=self.font_path,
+            background_color="white",
+            mask=self.mask,  # 리사이징된 마스크를 사용
+            max_words=DEFAULT_TOP_WORDS,
+            color_func=self.image_colors,
+            contour_width=1,
+            contour_color="black",
+            prefer_horizontal=1.0,  # 모든 단어를 수평으로
+        ).generate_from_frequencies(dict(freq_dict))
+
+        # 이미지를 파일로 저장하지 않고 메모리(BytesIO)에 저장
+        img_data = io.BytesIO()
+        wc.to_image().save(img_data, format="PNG")
+        return img_data.getvalue()
+
+    def generate_and_upload(self, lyrics, title, artist, weights=None):
         """
         전체 워드클라우드 생성 및 GCS 업로드 워크플로우를 수행합니다.
+        weights([[단어, 가중치], ...], playlist_term_weights 결과)가 주어지면 원시 빈도 대신 사용합니다.
         """
         if not lyrics or not self.client:
             return None
@@ -166,6 +313,12 @@ class ImageService:
 
         # 'wordclouds' 폴더 내부에 저장
         filename = f"wordclouds/{safe_title}_{safe_artist}.png"
+        if weights:
+            # 가중치는 플레이리스트마다 달라지므로 내용 해시를 캐시 키에 포함
+            digest = hashlib.sha1(
+                json.dumps(weights, ensure_ascii=False).encode("utf-8")
+            ).hexdigest()[:10]
+            filename = f"wordclouds/{safe_title}_{safe_artist}_{digest}.png"
 
         try:
             # 2. GCS 캐시 확인 (파일 존재 여부 체크)
@@ -179,31 +332,20 @@ class ImageService:
             # [Cache Miss] 이미지가 없으므로 생성 로직 진행
             print(f"❌ Cache Miss: '{filename}' 파일을 생성합니다.")
 
-            # 3. 텍스트 전처리 (곡 제목, 아티스트 불용어 처리 포함)
-            processed_lyrics = self._preprocess_lyrics(lyrics, title, artist)
-            if not processed_lyrics:
-                # 전처리 후 남은 텍스트가 없으면 빈 이미지 대신 오류나 기본 이미지 URL을 반환할 수 있다.
-                raise ValueError(
-                    "가사 텍스트가 너무 짧거나 불용어만으로 이루어져 있습니다."
-                )
-
-            freq_dict = self._getFrequencyDict(processed_lyrics)
+            if weights:
+                freq_dict = dict(weights)
+            else:
+                # 3. 텍스트 전처리 (곡 제목, 아티스트 불용어 처리 포함)
+                processed_lyrics = self._preprocess_lyrics(lyrics, title, artist)
+                if not processed_lyrics:
+                    # 전처리 후 남은 텍스트가 없으면 빈 이미지 대신 오류나 기본 이미지 URL을 반환할 수 있다.
+                    raise ValueError(
+                        "가사 텍스트가 너무 짧거나 불용어만으로 이루어져 있습니다."
+                    )
 
-            wc = WordCloud(
-                font_path=self.font_path,
-                background_color="white",
-                mask=self.mask,  # 리사이징된 마스크를 사용
-                max_words=50,
-                color_func=self.image_colors,
-                contour_width=1,
-                contour_color="black",
-                prefer_horizontal=1.0,  # 모든 단어를 수평으로
-            ).generate_from_frequencies(dict(freq_dict.items()))
+                freq_dict = self._getFrequencyDict(processed_lyrics)
 
-            # 이미지를 파일로 저장하지 않고 메모리(BytesIO)에 저장
-            img_data = io.BytesIO()
-            wc.to_image().save(img_data, format="PNG")
-            img_data.seek(0)
+            img_data = io.BytesIO(self.render_png(freq_dict))
 
             # GCS 업로드
             blob = self.bucket.blob(filename)
@@ -214,3 +356,13 @@ class ImageService:
         except Exception as e:
             print(f"워드클라우드 생성 또는 GCS 업로드 실패: {e}")
             return None
+
+
+if __name__ == "__main__":
+    # 빌드 시점에 마스크 에셋 생성 (dockerfile 참고)
+    static_dir = os.path.join(os.getcwd(), "app", "static")
+    path = build_mask_asset(
+        os.path.join(static_dir, "mask_image.png"),
+        os.path.join(static_dir, MASK_ASSET_NAME),
+    )
+    print(f"✅ 마스크 에셋 생성 완료: {path}")
@@ -0,0 +1,126 @@
+import time
+
+from firebase_admin import firestore
+
+from app.utils.lyrics_codec import decode_playlist, has_lyrics
+from app.utils.text_utils import track_key
+
+
+class AnalysisLeaseService:
+    """
+    AnalysisLeaseService 클래스
+    ---------------------------
+    같은 플레이리스트 문서에 대한 Gemini 분석이 동시에 두 번 수행되지 않도록,
+    문서 단위 분석 임대(Lease)를 Firestore 트랜잭션으로 관리합니다.
+
+    - 먼저 임대를 획득한 요청만 분석을 수행하고, 곡 하나가 끝날 때마다 결과를 트랜잭션으로 병합
+    - 나머지 요청은 임대가 풀리거나 만료될 때까지 문서를 폴링하며 기다림
+    - 분석 중 인스턴스가 죽어도 만료 시각(expiresAt)이 지나면 다른 요청이 이어받음
+
+    문서 필드: analysisLease = {"owner": 요청 ID, "expiresAt": epoch seconds}
+    """
+
+    LEASE_FIELD = "analysisLease"
+
+    def __init__(self, db_client, ttl=60, poll_interval=1.0, wait_timeout=15):
+        self.db = db_client
+        self.ttl = ttl  # 임대 유효 시간 (곡 하나 분석될 때마다 연장)
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+
+    # ────────────────────────────────
+    # 임대 획득/반납
+    def acquire(self, doc_ref, owner):
+        """
+        임대가 비어 있거나 만료되었으면 owner로 획득하고, 트랜잭션 안에서 읽은 문서 데이터를 반환합니다.
+        (획득 실패 시 None) 호출자는 이 데이터로 분석 대상을 다시 계산해야
+        획득 직전에 다른 요청이 끝낸 분석을 중복 수행하지 않습니다.
+        """
+        return firestore.transactional(self._acquire_tx)(
+            self.db.transaction(), doc_ref, owner
+        )
+
+    def _acquire_tx(self, transaction, doc_ref, owner):
+        snapshot = doc_ref.get(transaction=transaction)
+        data = snapshot.to_dict() or {}
+        lease = data.get(self.LEASE_FIELD) or {}
+        now = time.time()
+        if lease.get("owner") not in (None, owner) and lease.get("expiresAt", 0) > now:
+            return None
+        transaction.update(
+            doc_ref, {self.LEASE_FIELD: {"owner": owner, "expiresAt": now + self.ttl}}
+        )
+        return decode_playlist(data)
+
+    def release(self, doc_ref, owner):
+        """owner가 보유한 임대만 반납 (이미 다른 요청이 이어받았다면 건드리지 않음)"""
+        try:
+            firestore.transactional(self._release_tx)(
+                self.db.transaction(), doc_ref, owner
+            )
+        except Exception as e:
+            # 반납에 실패해도 만료 시각이 지나면 자동으로 풀림
+            print(f"⚠️ [Lease] 임대 반납 실패: {e}")
+
+    def _release_tx(self, transaction, doc_ref, owner):
+        snapshot = doc_ref.get(transaction=transaction)
+        lease = (snapshot.to_dict() or {}).get(self.LEASE_FIELD) or {}
+        if lease.get("owner") == owner:
+            transaction.update(doc_ref, {self.LEASE_FIELD: firestore.DELETE_FIELD})
+
+    # ────────────────────────────────
+    # 분석 결과 병합
+    def merge_analysis(self, doc_ref, results, owner=None):
+        """
+        곡별 분석 결과를 현재 문서의 tracks에 트랜잭션으로 병합합니다.
+        tracks 배열 전체를 덮어쓰던 방식과 달리, 다른 요청이 그 사이에 쓴 결과를 잃지 않습니다.
+        results: {track_key: {"summary": ..., "keywords": [...]}}
+        """
+        return firestore.transactional(self._merge_tx)(
+            self.db.transaction(), doc_ref, results, owner
+        )
+
+    def _merge_tx(self, transaction, doc_ref, results, owner):
+        snapshot = doc_ref.get(transaction=transaction)
+        data = snapshot.to_dict() or {}
+        tracks = data.get("tracks", [])
+
+        for track in tracks:
+            fields = results.get(track_key(track))
+            if fields and not track.get("summary"):
+                track.update(fields)
+
+        update = {"tracks": tracks}
+        if owner:
+            # 진행 중임을 알리도록 임대 연장 (heartbeat)
+            update[f"{self.LEASE_FIELD}.expiresAt"] = time.time() + self.ttl
+        if not any(self.needs_analysis(t) for t in tracks):
+            update["status"] = "analyzed"
+            update["analyzedAt"] = firestore.SERVER_TIMESTAMP
+        transaction.update(doc_ref, update)
+        return tracks
+
+    # ────────────────────────────────
+    # 대기
+    def wait_for_release(self, doc_ref) -> dict:
+        """
+        다른 요청이 보유한 임대가 풀릴 때(완료/만료)까지 문서를 폴링하고 최신 문서 데이터를 반환합니다.
+        wait_timeout이 지나면 그때까지 저장된 결과를 그대로 반환합니다.
+        """
+        deadline = time.time() + self.wait_timeout
+        while True:
+            data = doc_ref.get().to_dict() or {}
+            lease = data.get(self.LEASE_FIELD) or {}
+            pending = any(self.needs_analysis(t) for t in data.get("tracks", []))
+            if (
+                not pending
+                or lease.get("expiresAt", 0) <= time.time()
+                or time.time() >= deadline
+            ):
+                return decode_playlist(data)
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def needs_analysis(track) -> bool:
+        """가사는 있으나 아직 요약이 없는 곡인지 여부"""
+        return has_lyrics(track) and not track.get("summary")
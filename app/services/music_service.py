@@ -4,15 +4,47 @@ import time
 import re
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
-import lyricsgenius
 from firebase_admin import firestore
 import concurrent.futures
+import threading
 import requests
 
+from app.services.genius_client import PooledGenius
+from app.utils.lyrics_codec import encode_tracks
+from app.utils.text_utils import song_key
+
 
 class MusicDataService:
-    def __init__(self, db_client):
+    # Genius 가사 수집 동시 스레드 수 (커넥션 풀 크기도 동일하게 맞춤)
+    MAX_WORKERS = 10
+    # 크롤링 heartbeat가 이 시간(초) 이상 갱신되지 않으면 중단된 것으로 보고 재개 허용
+    # (Genius 429 백오프 최대 35초보다 충분히 길게)
+    RESUME_STALE_AFTER = 90
+    # 수집 중인 곡이 있는 동안 heartbeat를 갱신하는 주기(초)
+    # 곡 하나가 RESUME_STALE_AFTER보다 오래 걸려도(백오프 재시도 등) 중단된 것으로 오인되지 않도록 함
+    HEARTBEAT_INTERVAL = 30
+
+    def __init__(
+        self,
+        db_client,
+        search_service=None,
+        crawl_deadline=40,
+        straggler_timeout=120,
+        batch_deadline=240,
+    ):
         self.db = db_client  # Firestore Client 주입
+        # 가사 n-gram 역색인 (선택 주입, 없으면 색인 생략)
+        self.search_service = search_service
+        # 크롤링 시간 예산(초): 넘으면 수집된 곡만 먼저 저장 (Genius 429 백오프 중인 곡을 기다리지 않음)
+        self.crawl_deadline = crawl_deadline
+        # 예산 초과 후 남은 곡을 백그라운드에서 기다리는 최대 시간(초)
+        self.straggler_timeout = straggler_timeout
+        # 여러 플레이리스트 일괄 크롤링(/crawl/batch)의 시간 예산(초)
+        self.batch_deadline = batch_deadline
+        # 검색 색인은 곡당 수백 건의 쓰기가 필요하므로 응답 스레드가 아닌 백그라운드에서 순차 처리
+        self._index_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="search-index"
+        )
 
         # Spotify 설정
         client_id = os.environ.get("SPOTIFY_CLIENT_ID")
@@ -59,8 +91,10 @@ class MusicDataService:
         # Genius 설정
         genius_token = os.environ.get("GENIUS_TOKEN")
         if genius_token:
-            self.genius = lyricsgenius.Genius(
+            # 크롤링 스레드 수만큼 keep-alive 연결을 유지하는 클라이언트 (프록시 연결 포함)
+            self.genius = PooledGenius(
                 genius_token,
+                pool_size=self.MAX_WORKERS,
                 timeout=15,
                 retries=3,  # 라이브러리 자체 재시도 (429 외의 오류에 도움됨)
                 remove_section_headers=True,
@@ -71,15 +105,121 @@ class MusicDataService:
         else:
             self.genius = None
 
-    def fetch_and_save_playlist(self, playlist_id, request_id, client_ip):
-        """기존 스크립트의 메인 로직을 메서드로 구현"""
-        if not self.sp or not self.genius:
-            print("API Clients not initialized")
-            return None
+    def fetch_and_save_playlist(
+        self, playlist_id, request_id, client_ip, on_settled=None
+    ):
+        """
+        기존 스크립트의 메인 로직을 메서드로 구현
+        문서를 먼저 만들고 곡이 끝날 때마다 저장하므로, 중간에 인스턴스가 종료되어도
+        resume_crawl로 남은 곡만 이어서 수집할 수 있습니다.
+        on_settled: 백그라운드 수집까지 끝나거나 취소되어 Genius 호출이 멈추면 한 번 호출 (crawl 슬롯 반납용)
+        """
+        background = False
+        try:
+            if not self.sp or not self.genius:
+                print("API Clients not initialized")
+                return None
+
+            start_time = time.time()
+
+            # 1. Spotify 트랙 가져오기
+            fetched = self._fetch_playlist_items(playlist_id)
+            if fetched is None:
+                return None
+            items, original_count = fetched
+
+            # 2. 문서를 먼저 만들고 크롤링 상태를 기록 (곡은 끝나는 대로 추가)
+            doc_ref = self._create_playlist_doc(
+                request_id, playlist_id, items, original_count, client_ip
+            )
+            if doc_ref is None:
+                return None
+
+            # 3. Genius 가사 병렬 수집 (시간 예산 내에서)
+            background = self._run_crawl(
+                [(doc_ref, items)], start_time, on_settled=on_settled
+            )
+            print(
+                f"Firestore Saved: {request_id} (Time: {time.time() - start_time:.1f}s)"
+            )
+            return request_id
+        finally:
+            if on_settled and not background:
+                on_settled()
+
+    def fetch_and_save_playlists(
+        self, requests_by_playlist, client_ip, on_settled=None
+    ):
+        """
+        여러 플레이리스트를 한 번에 크롤링합니다. (퀴즈 팩 사전 적재용)
+        모든 플레이리스트의 샘플 트랙을 Spotify 트랙 ID 기준으로 합쳐 곡마다 가사를 한 번만 수집하고,
+        하나의 스레드풀(MAX_WORKERS)을 공유한 뒤 플레이리스트마다 user_playlists 문서를 하나씩 만듭니다.
+        requests_by_playlist: {playlist_id: request_id(문서 ID)}
+        반환값: {"docs": {playlist_id: 문서 ID 또는 None}, "totalTracks": 전체 곡 수, "uniqueTracks": 고유 곡 수}
+        on_settled: fetch_and_save_playlist와 동일
+        """
+        docs = {playlist_id: None for playlist_id in requests_by_playlist}
+        background = False
+        try:
+            if not self.sp or not self.genius:
+                print("API Clients not initialized")
+                return {"docs": docs, "totalTracks": 0, "uniqueTracks": 0}
+
+            start_time = time.time()
+
+            def prepare(playlist_id, request_id):
+                fetched = self._fetch_playlist_items(playlist_id)
+                if fetched is None:
+                    return None
+                items, original_count = fetched
+                doc_ref = self._create_playlist_doc(
+                    request_id, playlist_id, items, original_count, client_ip
+                )
+                return None if doc_ref is None else (doc_ref, items)
+
+            # Spotify 조회/문서 생성을 플레이리스트별로 동시에 수행
+            # (순차로 하면 왕복 시간이 플레이리스트 수만큼 쌓여 가사 수집 시간 예산을 잠식)
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(len(requests_by_playlist), self.MAX_WORKERS) or 1,
+                thread_name_prefix="spotify-fetch",
+            ) as executor:
+                prepared = list(
+                    executor.map(
+                        prepare, requests_by_playlist, requests_by_playlist.values()
+                    )
+                )
 
-        start_time = time.time()
+            doc_items = []
+            for (playlist_id, request_id), entry in zip(
+                requests_by_playlist.items(), prepared
+            ):
+                if entry is not None:
+                    doc_items.append(entry)
+                    docs[playlist_id] = request_id
+
+            total = sum(len(items) for _, items in doc_items)
+            unique = len({track_id for _, items in doc_items for track_id in items})
+            print(
+                f"📦 [Batch] {len(doc_items)}개 플레이리스트, {total}곡 → 고유 {unique}곡"
+            )
+
+            background = self._run_crawl(
+                doc_items,
+                start_time,
+                deadline=self.batch_deadline,
+                on_settled=on_settled,
+            )
+            print(f"📦 [Batch] 완료 (Time: {time.time() - start_time:.1f}s)")
+            return {"docs": docs, "totalTracks": total, "uniqueTracks": unique}
+        finally:
+            if on_settled and not background:
+                on_settled()
 
-        # 1. Spotify 트랙 가져오기
+    def _fetch_playlist_items(self, playlist_id):
+        """
+        Spotify 플레이리스트 트랙을 가져와 최대 MAX_TRACKS_LIMIT곡을 샘플링합니다.
+        반환값: ({트랙 ID: 재개용 항목}, 원본 트랙 수) (실패 시 None)
+        """
         print("🎵 Spotify 트랙 수집 중…")
         try:
             results = self.sp.playlist_items(playlist_id)
@@ -103,51 +243,287 @@ class MusicDataService:
             )
             tracks = random.sample(tracks, MAX_TRACKS_LIMIT)
 
-        # 2. Genius 가사 병렬 수집
-        MAX_WORKERS = 10
-        processed_songs = []
-        print(f"✅ {len(tracks)}개 트랙 처리 시작 — Genius 가사 검색")
-        print(f"⚡️ {MAX_WORKERS}개 스레드로 동시 가사 수집")
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_song = {
-                executor.submit(self._process_single_track, item): item
-                for item in tracks
-            }
-
-            for future in concurrent.futures.as_completed(future_to_song):
-                result = future.result()
-                if result:
-                    processed_songs.append(result)
-
-        print("💅 가사 전처리 진행중…")
-
-        # 3. Firestore 저장
+        # 재개에 필요한 정보만 남긴 트랙 목록 (Spotify 트랙 ID → 항목)
+        items = {}
+        for item in tracks:
+            track = item.get("track")
+            if track:
+                items.setdefault(self._track_id(track), self._compact_item(track))
+        return items, original_count
+
+    def _create_playlist_doc(
+        self, request_id, playlist_id, items, original_count, client_ip
+    ):
+        """크롤링 상태(crawlItems, crawlState)를 담은 빈 플레이리스트 문서를 생성 (실패 시 None)"""
         try:
             doc_ref = self.db.collection("user_playlists").document(request_id)
             doc_ref.set(
                 {
                     "playlistId": playlist_id,
-                    "tracks": processed_songs,
+                    "tracks": [],
                     "createdAt": firestore.SERVER_TIMESTAMP,
                     "originalTrackCount": original_count,
-                    "processedTrackCount": len(processed_songs),
+                    "processedTrackCount": 0,
+                    "crawlItems": items,
+                    "crawlState": {
+                        "pending": list(items),
+                        "done": [],
+                        "failed": [],
+                        "heartbeat": time.time(),
+                    },
+                    "crawlStatus": "running" if items else "complete",
                     "requestIp": client_ip,
                 }
             )
-            print(
-                f"Firestore Saved: {request_id} (Time: {time.time() - start_time:.1f}s)"
-            )
-            return request_id
+            return doc_ref
         except Exception as e:
             print(f"Firestore Save Error: {e}")
             return None
 
+    def resume_crawl(self, doc_id, retry_failed=False, on_settled=None):
+        """
+        중단된 크롤링(인스턴스 재시작, 타임아웃 등)을 이어서 수행합니다.
+        crawlState.pending에 남은 곡만 다시 수집하며, retry_failed=True면 실패한 곡도 재시도합니다.
+        다른 인스턴스가 아직 수집 중이면(heartbeat가 RESUME_STALE_AFTER초 이내) 중복 수집하지 않습니다.
+        반환값: 문서 ID (문서가 없거나 재개 정보가 없는 기존 문서면 None)
+        on_settled: fetch_and_save_playlist와 동일
+        """
+        background = False
+        try:
+            if not self.genius:
+                print("API Clients not initialized")
+                return None
+
+            doc_ref = self.db.collection("user_playlists").document(doc_id)
+            # 상태 확인과 선점(heartbeat 갱신)을 한 트랜잭션으로 → 동시 재개 요청 중 하나만 수집
+            claim = firestore.transactional(self._claim_resume_tx)(
+                self.db.transaction(), doc_ref, retry_failed
+            )
+            if claim is None:
+                return None
+            ids, items = claim
+            if not ids:
+                return doc_id
+
+            print(f"🔁 [Resume] {doc_id}: 남은 {len(ids)}곡 수집 재개")
+            background = self._run_crawl(
+                [(doc_ref, {i: items[i] for i in ids})],
+                time.time(),
+                on_settled=on_settled,
+            )
+            return doc_id
+        finally:
+            if on_settled and not background:
+                on_settled()
+
+    def _claim_resume_tx(self, transaction, doc_ref, retry_failed):
+        """
+        재개할 곡을 확인하고 crawlState를 갱신해 선점합니다.
+        반환값: (재개할 트랙 ID 목록, crawlItems) — 문서/재개 정보가 없으면 None,
+        남은 곡이 없거나 다른 인스턴스가 수집 중이면 빈 목록
+        """
+        snapshot = doc_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict() or {}
+        state, items = data.get("crawlState"), data.get("crawlItems")
+        if not state or not items:
+            return None
+
+        failed = list(state.get("failed", [])) if retry_failed else []
+        ids = [i for i in list(state.get("pending", [])) + failed if i in items]
+        if not ids:
+            return [], items
+        if (
+            data.get("crawlStatus") == "running"
+            and time.time() - state.get("heartbeat", 0) < self.RESUME_STALE_AFTER
+        ):
+            print(f"⏳ [Resume] 다른 인스턴스가 수집 중입니다: {doc_ref.id}")
+            return [], items
+
+        update = {"crawlStatus": "running", "crawlState.heartbeat": time.time()}
+        if failed:
+            update["crawlState.failed"] = firestore.ArrayRemove(failed)
+            update["crawlState.pending"] = firestore.ArrayUnion(failed)
+        transaction.update(doc_ref, update)
+        return ids, items
+
+    def _run_crawl(self, doc_items, start_time, deadline=None, on_settled=None):
+        """
+        문서별 곡 목록을 병렬로 수집하고, 곡이 끝날 때마다 해당 곡을 가진 모든 문서에 바로 저장합니다.
+        doc_items: [(doc_ref, {트랙 ID: 항목}), ...] — 여러 문서에 같은 곡이 있어도 한 번만 수집
+        - 성공: tracks에 추가, crawlState.pending → done / 실패: pending → failed
+        - deadline(기본 crawl_deadline)이 지나면 기다리지 않고 반환 (남은 곡은 백그라운드에서 계속 수집되어 저장됨)
+        - straggler_timeout이 지나도록 시작하지 못한 작업은 취소 (pending에 남아 resume_crawl 대상)
+        - 문서의 모든 곡이 정리되면 crawlStatus를 "complete"(취소된 곡이 있으면 "partial")로 변경
+        반환값: 백그라운드에 남은 곡이 있으면 True — 이 경우 남은 곡이 모두 끝나거나 취소될 때
+        on_settled를 한 번 호출 (False면 호출하지 않으므로 호출자가 바로 정리)
+        """
+        deadline = self.crawl_deadline if deadline is None else deadline
+        unique = {}  # 트랙 ID -> 항목
+        owners = {}  # 트랙 ID -> 이 곡을 가진 문서 인덱스 목록
+        for index, (_, items) in enumerate(doc_items):
+            for track_id, item in items.items():
+                unique.setdefault(track_id, item)
+                owners.setdefault(track_id, []).append(index)
+        if not unique:
+            return False
+
+        MAX_WORKERS = self.MAX_WORKERS
+        print(f"✅ {len(unique)}개 트랙 처리 시작 — Genius 가사 검색")
+        print(f"⚡️ {MAX_WORKERS}개 스레드로 동시 가사 수집")
+
+        lock = threading.Lock()
+        settled = threading.Event()
+        left = [len(unique)]
+        doc_left = [len(items) for _, items in doc_items]
+        doc_cancelled = [0] * len(doc_items)
+        finished = []  # 응답 전에 끝난 곡 (검색 색인 일괄 갱신용)
+        responded = [False]
+
+        def write(index, update):
+            try:
+                doc_items[index][0].update(update)
+            except Exception as e:
+                print(f"Firestore Track Update Error: {e}")
+
+        def on_done(future):
+            track_id = future_to_id[future]
+            result = None
+            if future.cancelled():
+                update = {}  # pending에 그대로 남김
+            else:
+                result = future.result()
+                if result:
+                    update = {
+                        "tracks": firestore.ArrayUnion(encode_tracks([result])),
+                        "processedTrackCount": firestore.Increment(1),
+                        "crawlState.pending": firestore.ArrayRemove([track_id]),
+                        "crawlState.done": firestore.ArrayUnion([track_id]),
+                    }
+                else:
+                    update = {
+                        "crawlState.pending": firestore.ArrayRemove([track_id]),
+                        "crawlState.failed": firestore.ArrayUnion([track_id]),
+                    }
+
+            # Firestore 쓰기는 락 밖에서 수행 (완료 콜백끼리 네트워크 I/O 뒤에 줄 서지 않도록)
+            # 배열/카운터 변환(ArrayUnion, Increment 등)은 순서와 무관하게 같은 결과가 됨
+            doc_update = dict(update, **{"crawlState.heartbeat": time.time()})
+            for index in owners[track_id]:
+                write(index, doc_update)
+
+            # 쓰기를 마친 뒤에 문서별 남은 곡 수를 줄이므로, 0으로 만든 콜백이 최종 상태를 기록하면
+            # 다른 곡의 저장보다 complete/partial이 먼저 기록되지 않음
+            with lock:
+                closing = []
+                for index in owners[track_id]:
+                    doc_left[index] -= 1
+                    doc_cancelled[index] += future.cancelled()
+                    if doc_left[index] == 0:
+                        closing.append((index, doc_cancelled[index]))
+            for index, cancelled in closing:
+                write(index, {"crawlStatus": "partial" if cancelled else "complete"})
+
+            with lock:
+                left[0] -= 1
+                index_now = bool(result) and responded[0]
+                if result and not responded[0]:
+                    finished.append(result)
+                if left[0] == 0:
+                    settled.set()
+                # 응답 후 마지막 백그라운드 곡: 이제 Genius 호출이 없으므로 슬롯 반납
+                background_settled = left[0] == 0 and responded[0]
+
+            if index_now:
+                self._index_tracks([result])
+            if background_settled and on_settled:
+                on_settled()
+
+        # 스레드 이름을 지정해 두면 /debug/profile 결과에서 크롤링 워커를 구분할 수 있음
+        # with 블록을 쓰지 않음: 종료 시 남은 작업을 기다리지 않고 바로 응답하기 위함
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_WORKERS, thread_name_prefix="genius-crawl"
+        )
+        future_to_id = {
+            executor.submit(self._process_single_track, item): track_id
+            for track_id, item in unique.items()
+        }
+        for future in future_to_id:
+            future.add_done_callback(on_done)
+        # 남은 작업은 백그라운드에서 계속 실행 (대기하지 않음)
+        executor.shutdown(wait=False)
+
+        def heartbeat():
+            # 모든 곡이 정리될 때까지 아직 열려 있는 문서의 heartbeat를 주기적으로 갱신
+            while not settled.wait(self.HEARTBEAT_INTERVAL):
+                with lock:
+                    open_docs = [i for i, n in enumerate(doc_left) if n > 0]
+                for index in open_docs:
+                    write(index, {"crawlState.heartbeat": time.time()})
+
+        threading.Thread(target=heartbeat, name="crawl-heartbeat", daemon=True).start()
+
+        remaining = deadline - (time.time() - start_time)
+        settled.wait(timeout=max(0, remaining))
+
+        with lock:
+            responded[0] = True
+            batch, pending = list(finished), left[0]
+
+        # 가사 검색용 역색인 갱신 (실패해도 크롤링 결과에는 영향 없음)
+        self._index_tracks(batch)
+
+        if pending:
+            print(
+                f"⏱️ 시간 예산({deadline}s) 초과 — {len(batch)}곡 먼저 저장, {pending}곡은 백그라운드에서 계속 수집"
+            )
+            timer = threading.Timer(
+                self.straggler_timeout, lambda: [f.cancel() for f in future_to_id]
+            )
+            timer.daemon = True
+            timer.start()
+        return pending > 0
+
+    def _index_tracks(self, tracks):
+        """가사 검색용 역색인 갱신을 백그라운드 큐에 넣음 (응답을 기다리게 하지 않음)"""
+        if self.search_service and tracks:
+            return self._index_executor.submit(self._index_now, list(tracks))
+        return None
+
+    def _index_now(self, tracks):
+        try:
+            self.search_service.index_tracks(tracks)
+        except Exception as e:
+            # 카탈로그는 포스팅 이후에 기록되므로 실패한 곡은 다음 색인 때 다시 시도됨
+            print(f"Search Index Error: {e}")
+
+    @staticmethod
+    def _track_id(track):
+        """Spotify 트랙 ID (로컬 파일 등 ID가 없으면 제목+가수 해시)"""
+        artists = track.get("artists") or [{}]
+        return track.get("id") or song_key(
+            track.get("name", ""), artists[0].get("name", "")
+        )
+
+    @staticmethod
+    def _compact_item(track):
+        """재개용으로 문서에 저장할 Spotify 트랙 정보 (_process_single_track 입력 형식)"""
+        images = (track.get("album") or {}).get("images") or []
+        return {
+            "track": {
+                "id": track.get("id"),
+                "name": track["name"],
+                "artists": [{"name": a["name"]} for a in track["artists"][:1]],
+                "album": {"images": images[:1]},
+            }
+        }
+
     def _process_single_track(self, item):
         """
         트랙 하나를 처리 [통합 로직]
         1. Spotify Raw Data 파싱
-        2. 재시도 및 다중 검색 전략
+        2. Genius 검색 1회 + 후보 점수화 (429 재시도)
         3. 앨범 아트 포함 반환
         """
         try:
@@ -160,51 +536,33 @@ class MusicDataService:
             artist = track["artists"][0]["name"]
             artist_expand = self._expand_artists(artist, title)
 
-            # 검색 시도할 조합 목록 (우선순위 순서)
-            search_attempts = [
-                (title_clean, artist),  # 1순위: 정제된 제목 + 원본 가수
-                (title_clean, artist_expand),  # 2순위: 정제된 제목 + 확장 가수
-                (title, artist),  # 3순위: 원본 제목 + 원본 가수
-                (title, artist_expand),  # 4순위: 원본 제목 + 확장 가수
-            ]
-
             song = None
             MAX_RETRIES = 3
             BASE_BACKOFF = 5
 
-            # Genius 검색
-            # 3. 검색 루프 (Outer Loop: 검색어 조합 변경)
-            for title, artist in search_attempts:
-                print(f"🪏 {title} - {artist} 수집 시작")
-                if not title or not artist:
-                    continue
-
-                # 4. 재시도 루프 (Inner Loop: 429 에러 대응)
-                for i in range(MAX_RETRIES):
-                    try:
-                        song = self.genius.search_song(
-                            title,
-                            artist,
-                            get_full_info=False,
+            # Genius 검색: 검색 API 1회 호출 후, 결과를 제목/가수 표기 후보 전체와 비교해
+            # 가장 잘 맞는 곡의 가사 페이지만 가져옴 (곡당 요청 2회)
+            print(f"🪏 {title_clean} - {artist} 수집 시작")
+            # 재시도 루프 (429 에러 대응)
+            for i in range(MAX_RETRIES):
+                try:
+                    song = self.genius.find_song(
+                        [title_clean, title], [artist, artist_expand]
+                    )
+                    break
+                except Exception as e:
+                    error_msg = str(e)
+                    # 429(Too Many Requests) 또는 403 에러 처리
+                    if "429" in error_msg or "403" in error_msg:
+                        error_code = 429 if "429" in error_msg else 403
+                        wait_time = BASE_BACKOFF * (2**i)  # 5초 -> 10초 -> 20초
+                        print(
+                            f"🚨 [Genius {error_code} Error] {title} - {artist}. {wait_time}초 후 재시도... (시도 {i+1}/{MAX_RETRIES})"
                         )
-                        if song:
-                            break  # 검색 성공 시 재시도 루프 탈출
-                    except Exception as e:
-                        error_msg = str(e)
-                        # 429(Too Many Requests) 또는 403 에러 처리
-                        if "429" in error_msg or "403" in error_msg:
-                            error_code = 429 if "429" in error_msg else 403
-                            wait_time = BASE_BACKOFF * (2**i)  # 5초 -> 10초 -> 20초
-                            print(
-                                f"🚨 [Genius {error_code} Error] {title} - {artist}. {wait_time}초 후 재시도... (시도 {i+1}/{MAX_RETRIES})"
-                            )
-                            time.sleep(wait_time)
-                        else:
-                            # 그 외 에러는 검색 실패로 간주하고 다음 검색어로 넘어감
-                            print(
-                                f"[Genius 검색/스크래핑 오류] {title} - {artist} :: {e}"
-                            )
-                            break
+                        time.sleep(wait_time)
+                    else:
+                        print(f"[Genius 검색/스크래핑 오류] {title} - {artist} :: {e}")
+                        break
 
             if not song:
                 return None
@@ -213,6 +571,7 @@ class MusicDataService:
             clean_lyrics_text = self._clean_lyrics(song.lyrics)
 
             return {
+                "track_id": self._track_id(track),
                 "original_title": title,
                 "clean_title": title_clean,
                 "artist": artist_expand,
@@ -228,7 +587,8 @@ class MusicDataService:
             print(f"Skipping track. error: {e}")
             return None
 
-    def _clean_lyrics(self, lyrics):
+    @staticmethod
+    def _clean_lyrics(lyrics):
         """
         1. "Read More" 버튼 텍스트가 있으면, 그 이전(설명글 포함)을 모두 삭제.
         2. "Read More"가 없으면, 기존 방식대로 "... Lyrics" 헤더 제거.
@@ -270,14 +630,16 @@ class MusicDataService:
 
         return lyrics.strip()
 
-    def _clean_title(self, title: str) -> str:
+    @staticmethod
+    def _clean_title(title: str) -> str:
         """(with…)/(feat…)·'From …' 표기를 제거해 검색 최적화"""
         title = re.sub(r"\s*\(.*?\)", "", title)  # 괄호
         title = re.sub(r"\s*- From .*?$", "", title)  # - From
         title = re.sub(r"\s*\[From .*?\]", "", title)  # [From …]
         return title.strip()
 
-    def _expand_artists(self, original_artist: str, title: str) -> str:
+    @staticmethod
+    def _expand_artists(original_artist: str, title: str) -> str:
         """제목의 (feat./with …) 부분까지 아티스트에 포함"""
         featured = re.findall(r"\((?:with|feat\.?)\s([^)]+)\)", title)
         return (
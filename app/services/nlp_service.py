@@ -1,8 +1,12 @@
 import os
+import time
 from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
+from app import config
+from app.utils.model_router import LatencyTracker, ModelRouter
+
 
 # 1. 응답 데이터 구조 정의 (Pydantic)
 # Gemini가 이 스키마에 맞춰서 정확한 JSON을 생성하도록 강제합니다.
@@ -15,8 +19,63 @@ class AnalysisResult(BaseModel):
     )
 
 
+def default_router() -> ModelRouter:
+    """
+    환경변수 설정(app.config)으로 기본 분석 경로 구성
+    max_output_tokens는 사고(thinking) 토큰을 포함한 상한이므로, 사고를 켜는 경로는 그만큼 더해 둠
+    (상한에 걸려 JSON이 잘리면 "분석 실패"로 저장되고 재분석되지 않음)
+    """
+    thinking = config.NLP_QUALITY_THINKING_BUDGET
+    return ModelRouter(
+        {
+            # 짧거나 반복적인 가사: 경량 모델, 작은 출력 예산, 사고 없음
+            "fast": {
+                "model": config.NLP_FAST_MODEL,
+                "max_output_tokens": 512,
+                "thinking_budget": 0,
+            },
+            "standard": {
+                "model": config.NLP_FAST_MODEL,
+                "max_output_tokens": 1024,
+                "thinking_budget": 0,
+            },
+            # 긴 가사: 상위 모델 (p95가 SLO 이내일 때만)
+            "quality": {
+                "model": config.NLP_QUALITY_MODEL,
+                "max_output_tokens": 1024 + thinking,
+                "thinking_budget": thinking,
+            },
+        },
+        slo_seconds=config.NLP_LATENCY_SLO,
+        short_chars=config.NLP_SHORT_LYRICS_CHARS,
+        long_chars=config.NLP_LONG_LYRICS_CHARS,
+        tracker=LatencyTracker(max_age=config.NLP_LATENCY_MAX_AGE),
+    )
+
+
 class NLPService:
-    def __init__(self):
+    # 안전 설정: 가사의 예술적 표현 허용 (BLOCK_NONE 적용)
+    SAFETY_SETTINGS = [
+        types.SafetySetting(
+            category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"
+        ),
+        types.SafetySetting(
+            category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"
+        ),
+        types.SafetySetting(
+            category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
+            threshold="BLOCK_NONE",
+        ),
+        types.SafetySetting(
+            category="HARM_CATEGORY_DANGEROUS_CONTENT",
+            threshold="BLOCK_NONE",
+        ),
+    ]
+
+    def __init__(self, router=None):
+        # 요청마다 모델/출력 예산을 고르는 라우터 (모델별 지연 시간 추적 포함)
+        self.router = router or default_router()
+
         # 2. 클라이언트 초기화
         # 환경변수 GEMINI_API_KEY 자동으로 감지합니다.
         self.api_key = os.environ.get("GEMINI_API_KEY")
@@ -32,13 +91,32 @@ class NLPService:
 
     def process_lyrics(self, lyrics, title=""):
         """
-        Gemini 2.5 Flash Lite를 사용하여 가사 요약 및 키워드 추출
+        가사 요약 및 키워드 추출 (기존 호환용: (summary, keywords)만 반환)
+        """
+        result = self.analyze(lyrics, title)
+        return result["summary"], result["keywords"]
+
+    def analyze(self, lyrics, title=""):
+        """
+        라우터가 고른 경로(모델 + 출력 예산)로 가사 요약 및 키워드 추출
+        반환값: {"summary", "keywords", "analysisRoute": {"route", "model", "latencyMs"}}
+        (analysisRoute는 분석 결과와 함께 저장하여 캐시 무효화/품질 비교에 사용)
         """
         # 방어 코드
         if not lyrics:
-            return "가사 없음", []
+            return {"summary": "가사 없음", "keywords": [], "analysisRoute": None}
         if not self.client:
-            return "API 키 미설정 오류", []
+            return {
+                "summary": "API 키 미설정 오류",
+                "keywords": [],
+                "analysisRoute": None,
+            }
+
+        route_name = self.router.choose(lyrics)
+        route = self.router.routes[route_name]
+        if route_name == "fast":
+            # 후렴 반복을 제거해 입력 토큰 절감
+            lyrics = ModelRouter.compact_lyrics(lyrics)
 
         # 3. 프롬프트 구성
         prompt = f"""
@@ -51,43 +129,46 @@ class NLPService:
         {lyrics}
         """
 
+        started_at = time.monotonic()
+        summary, keywords = "AI 서비스 오류 발생", []
+        ok = False
         try:
             # 4. API 호출 (구조화된 출력 사용)
             response = self.client.models.generate_content(
-                model="gemini-2.5-flash-lite",  # 최신 경량 모델 사용
+                model=route["model"],
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
                     response_schema=AnalysisResult,  # Pydantic 클래스 직접 전달
                     temperature=0.3,
-                    # 안전 설정: 가사의 예술적 표현 허용 (BLOCK_NONE 적용)
-                    safety_settings=[
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                            threshold="BLOCK_NONE",
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                            threshold="BLOCK_NONE",
-                        ),
-                    ],
+                    max_output_tokens=route["max_output_tokens"],
+                    thinking_config=types.ThinkingConfig(
+                        thinking_budget=route["thinking_budget"]
+                    ),
+                    safety_settings=self.SAFETY_SETTINGS,
                 ),
             )
 
             # 5. 결과 반환 (SDK가 Pydantic 객체로 자동 변환해줌)
             if response.parsed:
-                return response.parsed.summary, response.parsed.keywords
+                summary, keywords = response.parsed.summary, response.parsed.keywords
+                ok = True
             else:
                 # 파싱된 결과가 없는 경우 (매우 드묾)
                 print(f"⚠️ [NLPService] 파싱된 응답 없음. 원문: {response.text}")
-                return "분석 실패", []
+                summary = "분석 실패"
 
         except Exception as e:
-            print(f"❌ [NLPService] Gemini 분석 실패: {e}")
-            return "AI 서비스 오류 발생", []
+            print(f"❌ [NLPService] Gemini 분석 실패 ({route['model']}): {e}")
+
+        # 실패(빠른 예외 포함)는 SLO 초과 지연으로 기록 → 실패하는 모델이 빠른 모델로 보이지 않도록
+        elapsed = self.router.record(route_name, started_at, ok=ok)
+        return {
+            "summary": summary,
+            "keywords": keywords,
+            "analysisRoute": {
+                "route": route_name,
+                "model": route["model"],
+                "latencyMs": round(elapsed * 1000),
+            },
+        }
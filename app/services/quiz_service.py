@@ -0,0 +1,138 @@
+import random
+import hashlib
+
+import numpy as np
+
+from app.utils.text_utils import tokenize, track_key
+from app.utils.korean_normalizer import normalize_tokens
+
+
+class QuizService:
+    """
+    QuizService 클래스
+    ------------------
+    퀴즈 문항 구성에 필요한 부가 데이터를 계산합니다.
+    플레이리스트 곡들의 가사/키워드 TF-IDF 벡터로 유사도 행렬을 한 번에 계산하여,
+    각 곡과 가장 비슷한 다른 곡들을 객관식 오답 보기(Distractor)로 제공합니다.
+    """
+
+    # 키워드는 Gemini가 뽑은 핵심 단어이므로 가사 단어보다 가중치를 높게 준다.
+    KEYWORD_WEIGHT = 3
+    # 문서에 캐시해 두는 곡당 이웃 수 (보기 개수 상한)
+    MAX_NEIGHBORS = 10
+
+    def __init__(self, search_service=None):
+        # 플레이리스트만으로 보기가 부족할 때 카탈로그에서 보충 (선택 주입)
+        self.search_service = search_service
+
+    # ────────────────────────────────
+    # 유사도 계산
+    def similarity_matrix(self, tracks) -> np.ndarray:
+        """곡 x 곡 코사인 유사도 행렬 (TF-IDF, 대각 성분은 -1로 마스킹)"""
+        docs = []
+        for song in tracks:
+            tokens = normalize_tokens(tokenize(song.get("lyrics", "")))
+            for keyword in song.get("keywords") or []:
+                tokens.extend(normalize_tokens(tokenize(keyword)) * self.KEYWORD_WEIGHT)
+            docs.append(tokens)
+
+        vocab = {}
+        rows, cols = [], []
+        for i, tokens in enumerate(docs):
+            for token in tokens:
+                rows.append(i)
+                cols.append(vocab.setdefault(token, len(vocab)))
+
+        n = len(tracks)
+        counts = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+        np.add.at(counts, (rows, cols), 1.0)
+
+        # TF-IDF: 모든 곡에 등장하는 단어는 변별력이 없으므로 가중치를 낮춘다.
+        df = np.count_nonzero(counts, axis=0)
+        idf = np.log((1 + n) / (1 + df)) + 1.0
+        tfidf = counts * idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf /= np.where(norms == 0, 1.0, norms)
+
+        sim = tfidf @ tfidf.T
+        np.fill_diagonal(sim, -1.0)
+        return sim
+
+    def _signature(self, tracks) -> str:
+        """트랙 구성과 키워드 분석 여부가 같으면 캐시를 재사용하기 위한 서명"""
+        parts = sorted(f"{track_key(s)}:{int(bool(s.get('keywords')))}" for s in tracks)
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get_neighbors(self, playlist_data, tracks):
+        """
+        곡별 유사곡 제목 목록(유사도 내림차순)을 반환합니다.
+        문서에 저장된 캐시(choiceCache)가 유효하면 그대로 쓰고, 아니면 새로 계산합니다.
+        반환값: (neighbors, cache) - cache가 None이 아니면 문서에 저장해야 함
+        """
+        signature = self._signature(tracks)
+        cached = playlist_data.get("choiceCache") or {}
+        if cached.get("signature") == signature:
+            return cached.get("neighbors", {}), None
+
+        keys = [track_key(s) for s in tracks]
+        titles = [s.get("clean_title", s.get("original_title")) for s in tracks]
+        neighbors = {}
+        if len(tracks) > 1:
+            sim = self.similarity_matrix(tracks)
+            k = min(self.MAX_NEIGHBORS, len(tracks) - 1)
+            # 행 단위 상위 k개를 한 번에 선택 후 정렬
+            top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+            order = np.take_along_axis(sim, top, axis=1).argsort(axis=1)[:, ::-1]
+            top = np.take_along_axis(top, order, axis=1)
+            for i, key in enumerate(keys):
+                neighbors[key] = [titles[j] for j in top[i]]
+
+        cache = {"signature": signature, "neighbors": neighbors, "catalog": {}}
+        return neighbors, cache
+
+    # ────────────────────────────────
+    # 보기 구성
+    def build_choices(
+        self, song, neighbors, n_choices, use_catalog=False, catalog=None
+    ) -> list:
+        """
+        정답 + 유사곡 오답으로 n_choices개의 섞인 보기 리스트를 만듭니다.
+        catalog: {track_key: 카탈로그 보충 후보 제목} 캐시 (choiceCache.catalog)
+        — 없는 곡만 검색하고 결과를 채워 두므로 반복 플레이 시 검색하지 않음
+        """
+        answer = song.get("clean_title", song.get("original_title"))
+        options = [answer]
+        for title in neighbors.get(track_key(song), []):
+            if len(options) >= n_choices:
+                break
+            if title not in options:
+                options.append(title)
+
+        # 플레이리스트 곡이 부족하면 키워드로 카탈로그를 검색해 보충
+        if len(options) < n_choices and use_catalog and self.search_service:
+            key = track_key(song)
+            titles = (catalog or {}).get(key)
+            if titles is None:
+                titles = self._search_catalog(song)
+                if catalog is not None and titles is not None:
+                    catalog[key] = titles
+            for title in titles or []:
+                if len(options) >= n_choices:
+                    break
+                if title not in options:
+                    options.append(title)
+
+        random.shuffle(options)
+        return options
+
+    def _search_catalog(self, song):
+        """키워드(없으면 가사 앞부분)로 카탈로그를 검색한 보충 후보 제목 (보기 개수 상한만큼, 실패 시 None)"""
+        query = " ".join(song.get("keywords") or []) or song.get("lyrics", "")[:200]
+        answer = song.get("clean_title", song.get("original_title"))
+        try:
+            hits = self.search_service.search(query, limit=self.MAX_NEIGHBORS + 1)
+        except Exception as e:
+            print(f"⚠️ [QuizService] 카탈로그 보기 보충 실패: {e}")
+            return None
+        titles = [h["title"] for h in hits if h.get("title") and h["title"] != answer]
+        return list(dict.fromkeys(titles))[: self.MAX_NEIGHBORS]
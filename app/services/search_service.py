@@ -0,0 +1,203 @@
+import math
+import time
+import threading
+from collections import Counter
+
+from firebase_admin import firestore
+
+from app.utils.text_utils import char_ngrams, song_key
+
+
+class LyricsSearchService:
+    """
+    LyricsSearchService 클래스
+    --------------------------
+    수집된 가사 전체에 대한 문자 n-gram 역색인(Inverted Index)을 Firestore에 유지하고,
+    사용자가 입력한 가사 조각으로 곡(제목, 아티스트)을 찾아 순위대로 반환합니다.
+
+    - lyrics_ngram_index/{gram}_{shard} : {"songs": {song_key: 등장 횟수}}
+    - lyrics_catalog/{song_key} : {"title", "artist", "gramCount"}
+
+    흔한 n-gram의 포스팅이 카탈로그 전체로 커지지 않도록 곡 키 해시로 POSTING_SHARDS개 문서에 나누어 저장합니다.
+    (문서 1MiB 한도 및 동시 크롤링의 같은 문서 쓰기 경합 완화, songs.* 필드는 색인 제외 — cloudbuild.yaml)
+    샤딩 이전에 저장된 lyrics_ngram_index/{gram} 문서도 함께 읽습니다.
+    """
+
+    INDEX_COLLECTION = "lyrics_ngram_index"
+    CATALOG_COLLECTION = "lyrics_catalog"
+    # n-gram당 포스팅 문서 수 (검색 시 n-gram 하나에 이 수 + 1(기존 문서)만큼 읽음)
+    POSTING_SHARDS = 8
+    # Firestore 배치 쓰기 한도 (요청당 500건)
+    BATCH_LIMIT = 500
+
+    def __init__(self, db_client, cache_ttl=300, cache_size=20000):
+        self.db = db_client
+        # 포스팅 리스트 메모리 캐시: 자주 쓰이는 n-gram은 Firestore를 다시 읽지 않음
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache = {}  # gram -> (저장 시각, {song_key: tf})
+        self._lock = threading.Lock()
+
+    # ────────────────────────────────
+    # 색인 (Indexing)
+    def index_tracks(self, tracks) -> int:
+        """
+        크롤링된 트랙을 역색인에 추가합니다. (증분 색인)
+        이미 카탈로그에 있는 곡은 건너뛰고, 이번 요청의 신규 곡만 n-gram 단위로 병합 저장합니다.
+        반환값: 새로 색인된 곡 수
+        """
+        songs = {}
+        for track in tracks:
+            lyrics = track.get("lyrics", "")
+            title = track.get("clean_title") or track.get("original_title")
+            artist = track.get("artist", "")
+            if not lyrics or not title:
+                continue
+            songs[song_key(title, artist)] = (title, artist, lyrics)
+
+        if not songs:
+            return 0
+
+        # 1. 이미 색인된 곡 제외 (카탈로그 문서 일괄 조회)
+        catalog = self.db.collection(self.CATALOG_COLLECTION)
+        refs = [catalog.document(key) for key in songs]
+        for snapshot in self.db.get_all(refs):
+            if snapshot.exists:
+                songs.pop(snapshot.id, None)
+
+        if not songs:
+            return 0
+
+        # 2. (n-gram, 샤드)별 포스팅을 한 번에 모아, 문서 하나당 쓰기 1회로 병합
+        postings = {}
+        entries = []
+        for key, (title, artist, lyrics) in songs.items():
+            tf = Counter(char_ngrams(lyrics))
+            shard = self._shard(key)
+            for gram, count in tf.items():
+                postings.setdefault((gram, shard), {})[key] = count
+            entries.append(
+                (
+                    catalog.document(key),
+                    {
+                        "title": title,
+                        "artist": artist,
+                        "gramCount": sum(tf.values()),
+                        "indexedAt": firestore.SERVER_TIMESTAMP,
+                    },
+                )
+            )
+
+        # 카탈로그는 마지막에 커밋: 포스팅 저장이 중간에 실패하면 카탈로그가 없으므로 다음 색인 때 재시도됨
+        index = self.db.collection(self.INDEX_COLLECTION)
+        writes = [
+            (index.document(f"{gram}_{shard}"), {"songs": songs_tf})
+            for (gram, shard), songs_tf in postings.items()
+        ]
+        writes.extend(entries)
+
+        # 3. 500건씩 나누어 배치 커밋 (merge=True로 기존 포스팅 보존)
+        for start in range(0, len(writes), self.BATCH_LIMIT):
+            batch = self.db.batch()
+            for ref, data in writes[start : start + self.BATCH_LIMIT]:
+                batch.set(ref, data, merge=True)
+            batch.commit()
+
+        # 갱신된 n-gram은 캐시에서 제거
+        with self._lock:
+            for gram, _ in postings:
+                self._cache.pop(gram, None)
+
+        print(f"🔎 [Search] {len(songs)}곡 색인 완료 (포스팅 문서 {len(postings)}개)")
+        return len(songs)
+
+    def _shard(self, key) -> int:
+        """곡 키(16진수 해시)로 포스팅 샤드 번호 결정"""
+        return int(key[:8], 16) % self.POSTING_SHARDS
+
+    # ────────────────────────────────
+    # 검색 (Search)
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        가사 조각과 가장 많이 겹치는 곡을 점수 순으로 반환합니다.
+        점수 = (일치한 n-gram의 IDF 합) / (검색어 n-gram의 IDF 합), 0~1 범위
+        """
+        grams = set(char_ngrams(query))
+        if not grams:
+            return []
+
+        postings = self._get_postings(grams)
+
+        # 희귀한 n-gram일수록 가중치를 높게 (df가 작을수록 IDF 증가)
+        # 전체 카탈로그 크기를 따로 읽지 않도록, 가장 흔한 n-gram의 df로 근사한다.
+        total_songs = max((len(songs) for songs in postings.values()), default=0) + 1
+        idf = {
+            gram: math.log(1 + total_songs / (1 + len(postings.get(gram, {}))))
+            for gram in grams
+        }
+        query_weight = sum(idf.values())
+
+        scores = Counter()
+        for gram, songs in postings.items():
+            for key in songs:
+                scores[key] += idf[gram]
+
+        if not scores:
+            return []
+
+        top = scores.most_common(limit)
+        catalog = self.db.collection(self.CATALOG_COLLECTION)
+        meta = {
+            snapshot.id: snapshot.to_dict()
+            for snapshot in self.db.get_all([catalog.document(k) for k, _ in top])
+            if snapshot.exists
+        }
+
+        results = []
+        for key, score in top:
+            if key not in meta:
+                continue
+            results.append(
+                {
+                    "title": meta[key].get("title"),
+                    "artist": meta[key].get("artist"),
+                    "score": round(score / query_weight, 4),
+                }
+            )
+        return results
+
+    def _get_postings(self, grams) -> dict:
+        """n-gram 포스팅을 캐시 우선으로 읽고, 없는 것만 Firestore에서 일괄 조회합니다."""
+        now = time.time()
+        postings = {}
+        missing = []
+        with self._lock:
+            for gram in grams:
+                cached = self._cache.get(gram)
+                if cached and now - cached[0] < self.cache_ttl:
+                    postings[gram] = cached[1]
+                else:
+                    missing.append(gram)
+
+        if missing:
+            index = self.db.collection(self.INDEX_COLLECTION)
+            fetched = {gram: {} for gram in missing}
+            # n-gram별 모든 샤드 + 샤딩 이전 문서({gram})를 일괄 조회해 병합
+            doc_ids = {gram: gram for gram in missing}
+            for gram in missing:
+                for shard in range(self.POSTING_SHARDS):
+                    doc_ids[f"{gram}_{shard}"] = gram
+            for snapshot in self.db.get_all([index.document(d) for d in doc_ids]):
+                if snapshot.exists:
+                    fetched[doc_ids[snapshot.id]].update(
+                        (snapshot.to_dict() or {}).get("songs", {})
+                    )
+
+            with self._lock:
+                if len(self._cache) + len(fetched) > self.cache_size:
+                    self._cache.clear()
+                for gram, songs in fetched.items():
+                    self._cache[gram] = (now, songs)
+            postings.update(fetched)
+
+        return {gram: songs for gram, songs in postings.items() if songs}
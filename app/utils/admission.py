@@ -0,0 +1,149 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """과부하로 요청을 받지 않을 때 발생 (컨트롤러에서 429/503 + Retry-After로 변환)"""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status  # 429: 클라이언트 할당량 초과, 503: 서버 대기열 포화
+        self.retry_after = retry_after  # 초 단위
+        self.reason = reason
+
+
+class _Lane:
+    """작업 종류(crawl, analysis 등)별 동시 실행 슬롯과 유한 대기열"""
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.per_client = {}  # client_ip -> 진행 중(대기 포함) 요청 수
+        # 최근 처리 시간의 지수 이동 평균 (Retry-After 추정용)
+        self.avg_duration = 5.0
+        self.cond = threading.Condition()
+
+    def retry_after(self):
+        """대기열이 빠지는 데 걸릴 예상 시간 (최소 1초)"""
+        backlog = (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(self.avg_duration * backlog))
+
+
+class AdmissionController:
+    """
+    AdmissionController 클래스
+    --------------------------
+    프로세스 전역에서 lane별 동시 실행 수와 대기열 길이, 클라이언트 IP별 점유 수를 제한합니다.
+    슬롯이 없으면 유한 대기열에서 잠시 기다리고, 대기열까지 가득 찬 요청은 즉시 429/503으로 거절하여
+    과부하 시에도 지연 시간이 무한정 늘어나지 않도록 합니다.
+    """
+
+    def __init__(self, lanes, client_max_inflight=1):
+        # lanes: {name: (max_concurrent, max_queue, queue_timeout)}
+        self.lanes = {name: _Lane(name, *limits) for name, limits in lanes.items()}
+        self.client_max_inflight = client_max_inflight
+
+    @contextmanager
+    def admit(self, lane_name, client_ip=None):
+        """
+        with admission.admit("crawl", client_ip):
+            ...  # 슬롯을 확보한 상태에서 실행
+        """
+        release = self.hold(lane_name, client_ip)
+        try:
+            yield
+        finally:
+            release()
+
+    def reserved_threads(self):
+        """모든 lane이 동시에 점유할 수 있는 요청 처리 스레드 수 (실행 중 + 대기열)"""
+        return sum(lane.max_concurrent + lane.max_queue for lane in self.lanes.values())
+
+    def hold(self, lane_name, client_ip=None):
+        """
+        슬롯을 확보하고 반납 함수를 반환합니다. (슬롯이 없으면 AdmissionRejected)
+        요청이 끝난 뒤에도 백그라운드 작업이 남아 있어 with 블록보다 오래 점유해야 할 때 사용합니다.
+        반납 함수는 여러 번 호출해도 한 번만 반납합니다.
+        """
+        lane = self.lanes[lane_name]
+        with lane.cond:
+            # 1. 클라이언트별 할당량
+            if (
+                client_ip
+                and lane.per_client.get(client_ip, 0) >= self.client_max_inflight
+            ):
+                raise AdmissionRejected(
+                    429,
+                    lane.retry_after(),
+                    f"Too many concurrent '{lane.name}' requests from this client",
+                )
+
+            # 2. 슬롯이 없으면 유한 대기열에서 대기
+            if lane.active >= lane.max_concurrent:
+                if lane.waiting >= lane.max_queue:
+                    raise AdmissionRejected(
+                        503, lane.retry_after(), f"'{lane.name}' queue is full"
+                    )
+                lane.waiting += 1
+                self._track_client(lane, client_ip, +1)
+                try:
+                    admitted = lane.cond.wait_for(
+                        lambda: lane.active < lane.max_concurrent,
+                        timeout=lane.queue_timeout,
+                    )
+                finally:
+                    lane.waiting -= 1
+                if not admitted:
+                    self._track_client(lane, client_ip, -1)
+                    raise AdmissionRejected(
+                        503, lane.retry_after(), f"'{lane.name}' queue timed out"
+                    )
+            else:
+                self._track_client(lane, client_ip, +1)
+
+            lane.active += 1
+
+        start = time.time()
+        released = [False]
+
+        def release():
+            with lane.cond:
+                if released[0]:
+                    return
+                released[0] = True
+                lane.active -= 1
+                lane.avg_duration = 0.8 * lane.avg_duration + 0.2 * (
+                    time.time() - start
+                )
+                self._track_client(lane, client_ip, -1)
+                lane.cond.notify()
+
+        return release
+
+    @staticmethod
+    def _track_client(lane, client_ip, delta):
+        if not client_ip:
+            return
+        count = lane.per_client.get(client_ip, 0) + delta
+        if count > 0:
+            lane.per_client[client_ip] = count
+        else:
+            lane.per_client.pop(client_ip, None)
+
+    def stats(self):
+        """lane별 현재 상태 (디버깅/모니터링용)"""
+        return {
+            name: {
+                "active": lane.active,
+                "waiting": lane.waiting,
+                "max_concurrent": lane.max_concurrent,
+                "max_queue": lane.max_queue,
+            }
+            for name, lane in self.lanes.items()
+        }
@@ -0,0 +1,61 @@
+"""
+경량 한국어 조사/어미 정규화기
+------------------------------
+KoNLPy(JVM) 없이 "사랑을", "사랑이", "사랑해"를 모두 "사랑"으로 묶기 위한 규칙 기반 스트리퍼입니다.
+형태소 분석 대신 자주 쓰이는 조사·어미 접미사 테이블을 모듈 로드 시 한 번만 길이별로 컴파일해 두고,
+단어 끝에서 가장 긴 접미사부터 사전(set) 조회로 잘라냅니다. (단어당 수 μs)
+"""
+
+from functools import lru_cache
+
+from app.utils.text_utils import HANGUL_RE
+
+# 조사 (체언 뒤에 붙는 격조사/보조사)
+JOSA = (
+    "이 가 은 는 을 를 의 에 와 과 도 로 만 랑 께 야 아 "
+    "에서 에게 한테 으로 까지 부터 처럼 보다 이랑 이나 이든 마저 조차 "
+    "에서는 에게는 으로는 까지도 부터는 처럼은 보다는"
+).split()
+
+# 어미 (용언 "하다"류 활용형 중심: 가사에서 빈도가 높은 형태)
+EOMI = (
+    "해 했 한 할 함 "
+    "해요 해서 해도 해줘 했어 했던 했지 하는 하고 하게 하며 하면 하지 할게 할래 "
+    "해줘요 했어요 합니다 했네요 하니까 하잖아 할까요 "
+    "이야 이에요 예요 입니다 이었어"
+).split()
+
+# 조사/어미처럼 끝나지만 그 자체가 명사인 단어 (잘라내지 않음)
+EXCEPTIONS = frozenset("사나이 어린이 고양이 원숭이 아이 아가 언니 나비 하나".split())
+
+# 길이별 접미사 집합 (긴 접미사부터 검사하도록 내림차순)
+_SUFFIXES_BY_LEN = {}
+for _suffix in JOSA + EOMI:
+    _SUFFIXES_BY_LEN.setdefault(len(_suffix), set()).add(_suffix)
+_SUFFIX_LENGTHS = sorted(_SUFFIXES_BY_LEN, reverse=True)
+_SUFFIXES_BY_LEN = {n: frozenset(s) for n, s in _SUFFIXES_BY_LEN.items()}
+
+
+@lru_cache(maxsize=65536)
+def normalize_korean(word: str) -> str:
+    """
+    한글 단어 끝의 조사/어미를 제거한 어간을 반환합니다. (한글이 아니면 그대로 반환)
+    - 1음절 접미사는 어간이 2음절 이상 남을 때만 제거 ("아이" → "아이", "사랑이" → "사랑")
+    - 2음절 이상 접미사는 어간이 1음절 이상 남으면 제거 ("말해요" → "말")
+    """
+    if not word or not HANGUL_RE.match(word[-1]) or word in EXCEPTIONS:
+        return word
+
+    length = len(word)
+    for n in _SUFFIX_LENGTHS:
+        min_stem = 2 if n == 1 else 1
+        if length - n < min_stem:
+            continue
+        if word[-n:] in _SUFFIXES_BY_LEN[n]:
+            return word[:-n]
+    return word
+
+
+def normalize_tokens(tokens) -> list:
+    """토큰 리스트 전체에 조사/어미 정규화를 적용합니다."""
+    return [normalize_korean(token) for token in tokens]
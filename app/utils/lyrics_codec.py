@@ -0,0 +1,68 @@
+import zlib
+
+# Firestore 트랙 항목에 저장되는 압축 가사 필드
+# - lyricsZ: zlib 압축된 UTF-8 가사 (Firestore bytes 타입)
+# - lyricsCodec: 압축 방식 식별자 (방식이 바뀌어도 기존 문서를 읽을 수 있도록 함께 저장)
+# 기존(비압축) 문서는 "lyrics" 문자열 필드를 그대로 가지고 있으며, 읽기 시 그대로 통과시킨다.
+LYRICS_FIELD = "lyrics"
+COMPRESSED_FIELD = "lyricsZ"
+CODEC_FIELD = "lyricsCodec"
+CODEC_ZLIB = "zlib"
+
+# 가사 한 곡(수 KB)에서 6과 9의 압축률 차이는 거의 없고, 6이 더 빠름
+ZLIB_LEVEL = 6
+# 이보다 짧은 가사는 압축 이득보다 헤더 비용이 커서 원문 그대로 저장
+MIN_COMPRESS_BYTES = 256
+
+
+def compress_lyrics(lyrics: str) -> bytes:
+    return zlib.compress(lyrics.encode("utf-8"), ZLIB_LEVEL)
+
+
+def decompress_lyrics(data: bytes, codec: str = CODEC_ZLIB) -> str:
+    if codec != CODEC_ZLIB:
+        raise ValueError(f"Unknown lyrics codec: {codec}")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def encode_track(track: dict) -> dict:
+    """
+    저장용 트랙 사본을 반환합니다. 가사가 충분히 길면 lyrics 대신 lyricsZ/lyricsCodec으로 저장합니다.
+    (원본 dict는 수정하지 않음 → 검색 색인 등 후속 처리에서 원문을 그대로 사용 가능)
+    """
+    lyrics = track.get(LYRICS_FIELD) or ""
+    if len(lyrics.encode("utf-8")) < MIN_COMPRESS_BYTES:
+        return track
+
+    encoded = {k: v for k, v in track.items() if k != LYRICS_FIELD}
+    encoded[COMPRESSED_FIELD] = compress_lyrics(lyrics)
+    encoded[CODEC_FIELD] = CODEC_ZLIB
+    return encoded
+
+
+def decode_track(track: dict) -> dict:
+    """압축 가사를 풀어 lyrics 필드로 복원합니다. (기존 비압축 트랙은 그대로 반환, 제자리 수정)"""
+    data = track.pop(COMPRESSED_FIELD, None)
+    codec = track.pop(CODEC_FIELD, CODEC_ZLIB)
+    if data is not None:
+        track[LYRICS_FIELD] = decompress_lyrics(bytes(data), codec)
+    return track
+
+
+def encode_tracks(tracks: list) -> list:
+    return [encode_track(t) for t in tracks]
+
+
+def decode_playlist(playlist_data: dict) -> dict:
+    """Firestore 플레이리스트 문서 데이터의 모든 트랙 가사를 복원합니다."""
+    if playlist_data:
+        for track in playlist_data.get("tracks", []):
+            decode_track(track)
+    return playlist_data
+
+
+def has_lyrics(track: dict) -> bool:
+    """압축 여부와 관계없이 가사가 있는 트랙인지 (압축은 비어 있지 않은 가사에만 적용됨)"""
+    return bool(track.get(COMPRESSED_FIELD)) or bool(
+        (track.get(LYRICS_FIELD) or "").strip()
+    )
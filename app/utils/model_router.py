@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    모델별 최근 응답 시간(초)을 고정 크기 창으로 보관하고 p95를 계산합니다.
+    max_age초보다 오래된 표본은 버리므로, SLO 초과로 제외된 모델도 표본이 만료되면
+    (p95를 신뢰할 표본이 부족해져) 다시 후보가 되어 회복 여부를 확인받습니다.
+    """
+
+    def __init__(self, window=50, min_samples=5, max_age=300, clock=time.monotonic):
+        self.window = window
+        # 이보다 표본이 적으면 p95를 신뢰하지 않음 (None)
+        self.min_samples = min_samples
+        self.max_age = max_age
+        self._clock = clock
+        self._samples = {}  # model -> deque[(기록 시각, 초)]
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(
+                (self._clock(), seconds)
+            )
+
+    def _recent(self, model) -> list:
+        """만료된 표본을 제거하고 남은 응답 시간 목록을 반환 (락 보유 상태에서 호출)"""
+        samples = self._samples.get(model)
+        if not samples:
+            return []
+        cutoff = self._clock() - self.max_age
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [seconds for _, seconds in samples]
+
+    def p95(self, model):
+        with self._lock:
+            samples = sorted(self._recent(model))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+
+    def snapshot(self) -> dict:
+        """모델별 {"p95", "samples"} (진단용)"""
+        with self._lock:
+            counts = {m: len(self._recent(m)) for m in self._samples}
+        return {m: {"p95": self.p95(m), "samples": n} for m, n in counts.items()}
+
+
+class ModelRouter:
+    """
+    ModelRouter 클래스
+    ------------------
+    가사 길이/반복도와 모델별 최근 p95 지연 시간을 보고 요청마다 분석 경로(모델 + 출력 토큰 예산)를 고릅니다.
+
+    - 짧거나 후렴 반복이 많은 가사 → 가장 빠른 경로 (중복 줄 제거 후 요청)
+    - 긴 가사 → 상위 모델 우선, 보통 가사 → 기본 경로
+    - 후보 모델의 p95가 SLO를 넘으면(공급자 지연) 다음 후보로 내려가고,
+      모두 넘으면 p95가 가장 낮은 경로를 사용
+
+    routes: {경로 이름: {"model": 모델명, "max_output_tokens": 출력 예산, "thinking_budget": 사고 토큰 예산}}
+    """
+
+    def __init__(
+        self,
+        routes,
+        slo_seconds=8.0,
+        short_chars=600,
+        long_chars=2500,
+        repetitive_ratio=0.5,
+        tracker=None,
+        failure_penalty=None,
+    ):
+        self.routes = routes
+        self.slo_seconds = slo_seconds
+        self.short_chars = short_chars
+        self.long_chars = long_chars
+        # 고유 줄 비율이 이보다 낮으면 반복적인 가사로 판단
+        self.repetitive_ratio = repetitive_ratio
+        self.tracker = tracker or LatencyTracker()
+        # 실패한 호출은 최소 이 시간(초)으로 기록 (기본: SLO의 2배)
+        self.failure_penalty = (
+            2 * slo_seconds if failure_penalty is None else failure_penalty
+        )
+
+    @staticmethod
+    def unique_line_ratio(lyrics) -> float:
+        lines = [line.strip() for line in lyrics.splitlines() if line.strip()]
+        return len(set(lines)) / len(lines) if lines else 1.0
+
+    def candidates(self, lyrics) -> list:
+        """가사 특성에 따른 경로 후보 (선호 순서)"""
+        if (
+            len(lyrics) < self.short_chars
+            or self.unique_line_ratio(lyrics) < self.repetitive_ratio
+        ):
+            return ["fast"]
+        if len(lyrics) >= self.long_chars:
+            return ["quality", "standard", "fast"]
+        return ["standard", "fast"]
+
+    def choose(self, lyrics) -> str:
+        """SLO를 지키는 첫 번째 후보 경로 이름을 반환"""
+        names = [n for n in self.candidates(lyrics) if n in self.routes]
+        for name in names:
+            p95 = self.tracker.p95(self.routes[name]["model"])
+            if p95 is None or p95 <= self.slo_seconds:
+                return name
+        # 모든 후보가 SLO 초과: 관측된 p95가 가장 낮은 경로
+        return min(names, key=lambda n: self.tracker.p95(self.routes[n]["model"]))
+
+    def record(self, route_name, started_at, ok=True):
+        """
+        경로의 모델 응답 시간을 기록하고 실제 경과 시간을 반환
+        실패/타임아웃은 failure_penalty 이상으로 기록 → 빠르게 실패하는 모델의 p95가 낮아 보이지 않도록 함
+        """
+        elapsed = time.monotonic() - started_at
+        recorded = elapsed if ok else max(elapsed, self.failure_penalty)
+        self.tracker.record(self.routes[route_name]["model"], recorded)
+        return elapsed
+
+    @staticmethod
+    def compact_lyrics(lyrics) -> str:
+        """빠른 경로용: 반복되는 줄을 한 번만 남겨 입력 토큰을 줄임 (처음 등장 순서 유지)"""
+        seen = set()
+        lines = []
+        for line in lyrics.splitlines():
+            key = line.strip()
+            if key and key not in seen:
+                seen.add(key)
+                lines.append(line)
+        return "\n".join(lines)
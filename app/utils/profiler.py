@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter, deque
+
+
+def _collapse(frame, thread_name) -> str:
+    """
+    프레임 체인을 flamegraph용 collapsed stack 한 줄로 변환합니다.
+    형식: "스레드명;모듈:함수:줄;..." (호출 순서대로 루트 → 리프)
+    """
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        parts.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+def _thread_names() -> dict:
+    return {t.ident: t.name for t in threading.enumerate()}
+
+
+def sample_all_threads(seconds, interval=0.005) -> Counter:
+    """
+    seconds 동안 interval 간격으로 모든 스레드(크롤링 ThreadPoolExecutor 워커 포함)의 스택을 샘플링합니다.
+    인터프리터를 계측(settrace)하지 않고 sys._current_frames()만 주기적으로 읽으므로 오버헤드가 낮습니다.
+    반환값: {collapsed stack: 샘플 수}
+    """
+    own = threading.get_ident()
+    stacks = Counter()
+    names = _thread_names()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident not in names:
+                names = _thread_names()  # 새로 생성된 워커 스레드
+            stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """flamegraph.pl / speedscope에서 바로 읽을 수 있는 collapsed 형식 텍스트"""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+class SlowRequestSampler:
+    """
+    SlowRequestSampler 클래스
+    -------------------------
+    처리 시간이 threshold를 넘긴 요청의 스레드만 골라 스택을 샘플링하고,
+    요청이 끝나면 엔드포인트별 최근 기록(최대 max_records건)으로 보관합니다.
+    빠른 요청은 스택을 한 번도 읽지 않으므로 평상시 비용은 요청당 dict 갱신 두 번뿐입니다.
+    """
+
+    def __init__(self, threshold=2.0, interval=0.01, max_records=50):
+        self.threshold = threshold
+        self.interval = interval
+        self.records = deque(maxlen=max_records)
+        self._inflight = {}  # thread ident -> {"endpoint", "start", "stacks"}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._watchdog = None
+
+    def start_request(self, endpoint):
+        with self._lock:
+            self._inflight[threading.get_ident()] = {
+                "endpoint": endpoint,
+                "start": time.monotonic(),
+                "stacks": Counter(),
+            }
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(
+                    target=self._run, name="slow-request-sampler", daemon=True
+                )
+                self._watchdog.start()
+        self._wakeup.set()
+
+    def end_request(self, status=None):
+        with self._lock:
+            entry = self._inflight.pop(threading.get_ident(), None)
+        if not entry:
+            return
+        duration = time.monotonic() - entry["start"]
+        if duration >= self.threshold:
+            self.records.append(
+                {
+                    "endpoint": entry["endpoint"],
+                    "status": status,
+                    "duration_sec": round(duration, 3),
+                    "finished_at": time.time(),
+                    "stacks": format_collapsed(entry["stacks"]),
+                }
+            )
+
+    def _run(self):
+        """진행 중인 요청 중 threshold를 넘긴 것만 샘플링하는 백그라운드 루프"""
+        while True:
+            # 확인 전에 먼저 clear: 확인 직후 들어온 요청의 set()이 지워지지 않도록 함
+            self._wakeup.clear()
+            with self._lock:
+                idle = not self._inflight
+            if idle:
+                # 진행 중인 요청이 없으면 다음 요청이 들어올 때까지 대기
+                self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            frames = None
+            with self._lock:
+                for ident, entry in self._inflight.items():
+                    if now - entry["start"] < self.threshold:
+                        continue
+                    if frames is None:
+                        frames = sys._current_frames()
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        entry["stacks"][_collapse(frame, entry["endpoint"])] += 1
+            time.sleep(self.interval)
@@ -0,0 +1,93 @@
+import re
+import hashlib
+from difflib import SequenceMatcher
+
+# 한글 음절(가-힣) 범위
+HANGUL_RE = re.compile(r"[가-힣]")
+# 검색/색인용 정규화: 영숫자(\w)와 공백 외 문자는 모두 제거
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+# 같은 문자 체계(한글 / 그 외)끼리 묶인 연속 구간
+_SCRIPT_RUN_RE = re.compile(r"[가-힣]+|[^가-힣]+")
+
+# 제목/가수 변형 추출용: 괄호·대괄호 안 표기, " - From ..." 같은 꼬리표, feat./with 표기
+_BRACKET_RE = re.compile(r"[(\[]([^)\]]*)[)\]]")
+_DASH_SUFFIX_RE = re.compile(r"\s+-\s+.*$")
+_FEAT_RE = re.compile(r"^(?:feat\.?|ft\.?|featuring|with|prod\.?)\s", re.IGNORECASE)
+
+# 문자 체계별 n-gram 크기
+# 한글은 음절 하나의 정보량이 커서 bigram, 라틴 문자는 trigram이 적당하다.
+HANGUL_NGRAM = 2
+LATIN_NGRAM = 3
+
+
+def normalize_text(text: str) -> str:
+    """소문자화 후 문장 부호를 제거하고 공백을 하나로 축소합니다."""
+    if not text:
+        return ""
+    text = _NON_WORD_RE.sub(" ", text.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def char_ngrams(text: str) -> list:
+    """
+    가사/검색어를 문자 n-gram 리스트로 변환합니다.
+    띄어쓰기가 달라도 같은 결과가 나오도록 공백을 모두 제거한 뒤,
+    한글 구간은 bigram, 그 외(라틴 문자, 숫자) 구간은 trigram으로 자릅니다.
+    """
+    compact = normalize_text(text).replace(" ", "").replace("_", "")
+    grams = []
+    for run in _SCRIPT_RUN_RE.findall(compact):
+        n = HANGUL_NGRAM if HANGUL_RE.match(run) else LATIN_NGRAM
+        grams.extend(run[i : i + n] for i in range(len(run) - n + 1))
+    return grams
+
+
+def song_key(title: str, artist: str) -> str:
+    """제목+아티스트 조합으로 카탈로그 전역에서 고유한 곡 키를 생성합니다."""
+    raw = f"{normalize_text(title)}\x00{normalize_text(artist)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def tokenize(text: str) -> list:
+    """정규화된 텍스트를 공백 기준 단어 리스트로 분리합니다."""
+    return normalize_text(text).split()
+
+
+def track_key(track: dict) -> str:
+    """플레이리스트 문서 안의 트랙을 식별하는 키 (Spotify ID가 없으면 제목+아티스트 해시)"""
+    if track.get("track_id"):
+        return track["track_id"]
+    title = track.get("clean_title") or track.get("original_title", "")
+    return song_key(title, track.get("artist", ""))
+
+
+def name_variants(text: str) -> set:
+    """
+    제목/가수 표기를 비교용 변형 집합으로 펼칩니다. (정규화 후 공백 제거)
+    - 괄호 병기: "강남스타일 (Gangnam Style)" → 원문, "강남스타일", "gangnamstyle"
+    - 꼬리표 제거: "Song - From "OST"" → "song"
+    - feat./with 괄호는 제목 변형에서 제외
+    """
+    if not text:
+        return set()
+    base = _BRACKET_RE.sub(" ", text)
+    parts = [text, base, _DASH_SUFFIX_RE.sub("", base)]
+    parts += [p for p in _BRACKET_RE.findall(text) if not _FEAT_RE.match(p.strip())]
+    variants = {normalize_text(p).replace(" ", "") for p in parts}
+    variants.discard("")
+    return variants
+
+
+def name_similarity(a: set, b: set) -> float:
+    """두 변형 집합 사이의 최대 유사도 (0~1, 한쪽이 다른 쪽을 포함하면 0.9 이상)"""
+    best = 0.0
+    for x in a:
+        for y in b:
+            if x == y:
+                return 1.0
+            score = SequenceMatcher(None, x, y).ratio()
+            if min(len(x), len(y)) >= 2 and (x in y or y in x):
+                score = max(score, 0.9)
+            best = max(best, score)
+    return best
@@ -0,0 +1,259 @@
+"""
+텍스트 처리/워드클라우드 렌더링 핫패스 마이크로 벤치마크
+-------------------------------------------------------
+네트워크(Spotify, Genius, Gemini, GCS) 없이 실행됩니다.
+examples/playlist_lyrics_processed.json 가사를 섞고 반복하여 큰 합성 코퍼스를 만든 뒤,
+각 핫패스의 최소 실행 시간(repeat 중 최솟값)을 측정하여 benchmarks/baseline.json과 비교합니다.
+
+사용 예:
+    python -m benchmarks.run                      # 기준선 대비 비교 (회귀 시 종료 코드 1)
+    python -m benchmarks.run --update-baseline    # 현재 결과를 기준선으로 저장
+    python -m benchmarks.run --only clean_lyrics --threshold 1.2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+
+from wordcloud.wordcloud import FONT_PATH as WORDCLOUD_FONT_PATH
+
+from app.services.music_service import MusicDataService
+from app.services.image_service import ImageService
+from app.services.genius_client import PooledGenius
+from app.utils.lyrics_codec import encode_tracks, decode_playlist
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BASE_DIR, "baseline.json")
+EXAMPLES_PATH = os.path.join(
+    os.path.dirname(BASE_DIR), "examples", "playlist_lyrics_processed.json"
+)
+
+# Spotify에서 자주 보이는 제목 표기 (괄호, feat., - From 등)
+TITLE_PATTERNS = [
+    "{t}",
+    "{t} (feat. {a})",
+    "{t} (with {a})",
+    '{t} - From "{t} OST"',
+    '{t} [From "{t}"]',
+    "{t} (Remastered 2011) (feat. {a})",
+]
+
+
+def build_corpus(scale, seed=42):
+    """
+    예제 가사를 줄 단위로 섞어 scale곡 분량의 합성 코퍼스를 생성합니다.
+    Genius 원문처럼 설명글/Read More/섹션 태그/Embed 꼬리말을 포함합니다.
+    """
+    with open(EXAMPLES_PATH, "r", encoding="utf-8") as f:
+        songs = json.load(f)
+
+    rng = random.Random(seed)
+    lines = [line for s in songs for line in s["lyrics"].splitlines() if line.strip()]
+    corpus = []
+    for i in range(scale):
+        body = rng.sample(lines, min(len(lines), 60))
+        for j in range(0, len(body), 8):
+            body.insert(j, f"[Verse {j // 8 + 1}]")
+        src = songs[i % len(songs)]
+        raw = (
+            f"{rng.randint(1, 300)} Contributors{src['clean_title']} Lyrics"
+            f"{src['artist']} wrote this song about… Read More\n\n"
+            + "\n".join(body)
+            + f"\n\n\n{rng.randint(1, 99)}Embed"
+        )
+        title = rng.choice(TITLE_PATTERNS).format(t=src["clean_title"], a="Guest")
+        corpus.append({"raw": raw, "title": title, "artist": src["artist"]})
+    return corpus
+
+
+def build_lyrics_page(lyrics):
+    """
+    Genius 곡 페이지와 비슷한 구조의 HTML을 생성합니다.
+    (대용량 스크립트/내비게이션/추천 목록 사이에 data-lyrics-container 블록이 끼어 있는 형태)
+    """
+    filler = "".join(
+        f'<div class="SongCard__Item-{i}"><a href="/songs/{i}">Recommended {i}</a>'
+        f"<span>Artist {i}</span></div>"
+        for i in range(400)
+    )
+    script = "<script>window.__PRELOADED_STATE__ = {%s};</script>" % (
+        ",".join(f'"k{i}": "{"x" * 40}"' for i in range(2000))
+    )
+    blocks = lyrics.split("\n\n")
+    containers = "".join(
+        '<div data-lyrics-container="true" class="Lyrics__Container-sc-1ynbvzw-1">'
+        + "<br/>".join(f"<i>{line}</i>" for line in block.splitlines())
+        + "</div>"
+        for block in blocks
+    )
+    return (
+        f"<html><head>{script}</head><body><nav>{filler}</nav>"
+        f'<main><div class="Lyrics__Root">{containers}</div></main>'
+        f"<footer>{filler}</footer></body></html>"
+    )
+
+
+def measure(fn, repeat, number):
+    """fn을 number회 실행하는 것을 repeat번 반복하여, 1회당 최소 시간(ms)을 반환"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def define_benchmarks(scale):
+    """벤치마크 이름 → (함수, repeat, number)"""
+    corpus = build_corpus(scale)
+    image_service = ImageService(bucket_name=None)
+    if not os.path.exists(image_service.font_path):
+        # 한글 폰트가 없는 로컬 환경: 렌더링 시간 측정용으로 WordCloud 기본 폰트 주입
+        image_service.font_path = WORDCLOUD_FONT_PATH
+
+    cleaned = [MusicDataService._clean_lyrics(s["raw"]) for s in corpus]
+    processed = [
+        image_service._preprocess_lyrics(text, s["title"], s["artist"])
+        for text, s in zip(cleaned, corpus)
+    ]
+    freq = image_service._getFrequencyDict(processed[0])
+    page = build_lyrics_page(cleaned[0])
+    # Firestore 문서 1개 분량(30곡)의 압축 가사
+    stored = encode_tracks([{"lyrics": text} for text in cleaned[:30]])
+    tracks = [
+        {"lyrics": text, "original_title": s["title"], "artist": s["artist"]}
+        for text, s in zip(cleaned[:30], corpus)
+    ]
+
+    return {
+        # 코퍼스 전체 1회 처리 시간
+        "clean_lyrics": (
+            lambda: [MusicDataService._clean_lyrics(s["raw"]) for s in corpus],
+            5,
+            1,
+        ),
+        "clean_title": (
+            lambda: [MusicDataService._clean_title(s["title"]) for s in corpus],
+            5,
+            5,
+        ),
+        "expand_artists": (
+            lambda: [
+                MusicDataService._expand_artists(s["artist"], s["title"])
+                for s in corpus
+            ],
+            5,
+            5,
+        ),
+        "preprocess_lyrics": (
+            lambda: [
+                image_service._preprocess_lyrics(text, s["title"], s["artist"])
+                for text, s in zip(cleaned, corpus)
+            ],
+            3,
+            1,
+        ),
+        "frequency_dict": (
+            lambda: [image_service._getFrequencyDict(text) for text in processed],
+            5,
+            1,
+        ),
+        # 플레이리스트 문서 1개(30곡) 전체의 곡별 TF-IDF 특징 단어
+        "playlist_term_weights": (
+            lambda: image_service.playlist_term_weights(tracks),
+            5,
+            5,
+        ),
+        # Genius 곡 페이지 1개에서 가사 추출
+        "lyrics_page_parse": (lambda: PooledGenius.extract_lyrics(page), 5, 5),
+        # 플레이리스트 문서 1개(30곡) 가사 압축/복원
+        "lyrics_encode": (
+            lambda: encode_tracks([{"lyrics": text} for text in cleaned[:30]]),
+            5,
+            20,
+        ),
+        "lyrics_decode": (
+            lambda: decode_playlist({"tracks": [dict(t) for t in stored]}),
+            5,
+            20,
+        ),
+        # 곡 1개 워드클라우드 배치 + PNG 인코딩
+        "wordcloud_render": (lambda: image_service.render_png(freq), 3, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--scale", type=int, default=500, help="합성 코퍼스 곡 수")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="기준선 대비 허용 배수 (이보다 느리면 회귀로 판정)",
+    )
+    parser.add_argument("--only", nargs="*", help="지정한 벤치마크만 실행")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    benchmarks = define_benchmarks(args.scale)
+    if args.only:
+        benchmarks = {k: v for k, v in benchmarks.items() if k in args.only}
+
+    results = {}
+    for name, (fn, repeat, number) in benchmarks.items():
+        fn()  # 워밍업 (정규식 컴파일 캐시, lru_cache 등)
+        results[name] = measure(fn, repeat, number)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline = {
+            "scale": args.scale,
+            "machine": f"{platform.machine()} / Python {platform.python_version()}",
+            "results_ms": {
+                **baseline.get("results_ms", {}),
+                **{k: round(v, 3) for k, v in results.items()},
+            },
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"💾 기준선 저장: {BASELINE_PATH}")
+
+    if baseline.get("scale", args.scale) != args.scale:
+        print(f"⚠️ 기준선은 scale={baseline['scale']}에서 측정되었습니다.")
+
+    regressions = []
+    print(f"{'benchmark':<20}{'current(ms)':>14}{'baseline(ms)':>14}{'ratio':>8}")
+    for name, current in results.items():
+        base = baseline.get("results_ms", {}).get(name)
+        ratio = current / base if base else None
+        flag = ""
+        if ratio and ratio > args.threshold:
+            regressions.append(name)
+            flag = "  ❌ REGRESSION"
+        print(
+            f"{name:<20}{current:>14.3f}"
+            f"{(f'{base:.3f}' if base else '-'):>14}"
+            f"{(f'{ratio:.2f}x' if ratio else '-'):>8}{flag}"
+        )
+
+    if regressions:
+        print(
+            f"❌ 기준선 대비 {args.threshold}배 이상 느려짐: {', '.join(regressions)}"
+        )
+        return 1
+    print("✅ 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
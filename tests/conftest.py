@@ -29,6 +29,8 @@ def app(mock_db):
     app.music_service = MagicMock()
     app.nlp_service = MagicMock()
     app.image_service = MagicMock()
+    app.search_service = MagicMock()
+    app.lease_service = MagicMock()
 
     yield app
 
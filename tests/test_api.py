@@ -55,9 +55,15 @@ def test_quizdata_lazy_analysis(client, app):
         ]
     }
     app.db.collection().document().get.return_value = mock_doc
+    # 임대 획득 시 트랜잭션 안에서 읽은 문서 (분석 필요 상태 그대로)
+    app.lease_service.acquire.return_value = mock_doc.to_dict.return_value
 
     # 2. Mock NLP Service 설정
-    app.nlp_service.process_lyrics.return_value = ("요약문", ["키워드1", "키워드2"])
+    app.nlp_service.analyze.return_value = {
+        "summary": "요약문",
+        "keywords": ["키워드1", "키워드2"],
+        "analysisRoute": {"route": "fast", "model": "m", "latencyMs": 10},
+    }
 
     # 3. API 요청
     response = client.get("/quizdata/test_doc_id_123")
@@ -69,4 +75,365 @@ def test_quizdata_lazy_analysis(client, app):
     assert data[0]["summary"] == "요약문"
 
     # NLP 서비스가 호출되었는지 확인 (Lazy Analysis 작동 여부)
-    app.nlp_service.process_lyrics.assert_called_once()
+    app.nlp_service.analyze.assert_called_once()
+    # 분석 경로가 분석 결과와 함께 병합되는지 확인
+    (_, results, _), _ = app.lease_service.merge_analysis.call_args
+    assert list(results.values())[0]["analysisRoute"]["route"] == "fast"
+
+
+def test_search_lyrics(client, app):
+    """GET /search 요청 시 SearchService 결과를 그대로 반환하는지 테스트"""
+    app.search_service.search.return_value = [
+        {"title": "Gangnam Style", "artist": "PSY", "score": 0.92}
+    ]
+
+    response = client.get("/search?q=오빤 강남 스타일")
+
+    assert response.status_code == 200
+    assert response.json["results"][0]["title"] == "Gangnam Style"
+    app.search_service.search.assert_called_once_with("오빤 강남 스타일", limit=10)
+
+    # 검색어 누락 시 400
+    assert client.get("/search").status_code == 400
+
+
+def test_quizdata_multiple_choices(client, app):
+    """GET /quizdata?choices=N 요청 시 문항마다 정답을 포함한 N개의 보기를 반환하는지 테스트"""
+    mock_doc = MagicMock()
+    mock_doc.exists = True
+    mock_doc.to_dict.return_value = {
+        "tracks": [
+            {
+                "clean_title": title,
+                "artist": "Artist",
+                "lyrics": lyrics,
+                "summary": "요약문",
+                "keywords": ["키워드"],
+            }
+            for title, lyrics in [
+                ("Song A", "love you baby tonight"),
+                ("Song B", "love you baby forever"),
+                ("Song C", "rain falls on the city"),
+            ]
+        ]
+    }
+    app.db.collection().document().get.return_value = mock_doc
+
+    response = client.get("/quizdata/test_doc_id_123?choices=2")
+
+    assert response.status_code == 200
+    by_title = {item["title"]: item for item in response.json}
+    # 가사가 가장 비슷한 곡이 오답 보기로 선택됨
+    assert sorted(by_title["Song A"]["choices"]) == ["Song A", "Song B"]
+    assert sorted(by_title["Song B"]["choices"]) == ["Song A", "Song B"]
+    # 계산된 유사도 결과는 문서에 캐시됨
+    update = app.db.collection().document().update.call_args[0][0]
+    assert "choiceCache" in update
+
+
+def test_crawl_rejected_under_overload(client, app):
+    """과부하로 거절되면 429/503과 Retry-After 헤더를 반환하는지 테스트"""
+    from app.utils.admission import AdmissionRejected
+
+    app.admission = MagicMock()
+    app.admission.hold.side_effect = AdmissionRejected(503, 7, "'crawl' queue is full")
+
+    payload = {"playlist_url": "http://spotify.com/playlist/123"}
+    response = client.post(
+        "/crawl", data=json.dumps(payload), content_type="application/json"
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    app.music_service.fetch_and_save_playlist.assert_not_called()
+
+
+def test_quizdata_waits_for_leased_analysis(client, app):
+    """다른 요청이 분석 중(임대 보유)이면 Gemini를 다시 호출하지 않고 그 결과를 사용하는지 테스트"""
+    pending_doc = MagicMock()
+    pending_doc.exists = True
+    pending_doc.to_dict.return_value = {
+        "tracks": [{"clean_title": "Song A", "artist": "Artist A", "lyrics": "La La"}]
+    }
+    app.db.collection().document().get.return_value = pending_doc
+    app.admission = MagicMock()
+
+    app.lease_service.acquire.return_value = None
+    app.lease_service.wait_for_release.return_value = {
+        "tracks": [
+            {
+                "clean_title": "Song A",
+                "artist": "Artist A",
+                "lyrics": "La La",
+                "summary": "요약문",
+                "keywords": ["키워드"],
+            }
+        ]
+    }
+
+    response = client.get("/quizdata/test_doc_id_123")
+
+    assert response.status_code == 200
+    assert response.json[0]["summary"] == "요약문"
+    app.nlp_service.analyze.assert_not_called()
+    # 대기 중인 요청은 analysis lane이 아닌 유한한 lease_wait lane 슬롯만 점유
+    assert [c.args[0] for c in app.admission.admit.call_args_list] == ["lease_wait"]
+
+
+def test_quizdata_lease_wait_is_bounded(client, app):
+    """분석 결과를 한 번 기다린 뒤에도 다른 요청이 분석 중이면 202 + Retry-After로 응답하는지 테스트"""
+    from app.utils.admission import AdmissionController
+
+    pending = {
+        "tracks": [{"clean_title": "Song A", "artist": "Artist A", "lyrics": "La La"}]
+    }
+    pending_doc = MagicMock()
+    pending_doc.exists = True
+    pending_doc.to_dict.return_value = pending
+    app.db.collection().document().get.return_value = pending_doc
+    app.admission = AdmissionController({"lease_wait": (1, 0, 0)})
+    app.lease_service.acquire.return_value = None
+    app.lease_service.wait_for_release.return_value = pending
+
+    response = client.get("/quizdata/test_doc_id_123")
+
+    assert response.status_code == 202
+    assert int(response.headers["Retry-After"]) > 0
+    app.lease_service.wait_for_release.assert_called_once()
+    app.nlp_service.analyze.assert_not_called()
+
+    # 대기 슬롯이 모두 차 있으면 기다리지 않고 즉시 503
+    release = app.admission.hold("lease_wait", "198.51.100.9")
+    app.lease_service.wait_for_release.reset_mock()
+    response = client.get("/quizdata/test_doc_id_123")
+    release()
+
+    assert response.status_code == 503
+    app.lease_service.wait_for_release.assert_not_called()
+
+
+def test_quizdata_rechecks_pending_after_lease(client, app):
+    """임대 획득 직전에 다른 요청이 분석을 끝냈다면, 획득 시점 문서 기준으로 재분석하지 않는지 테스트"""
+    stale_doc = MagicMock()
+    stale_doc.exists = True
+    stale_doc.to_dict.return_value = {
+        "tracks": [{"clean_title": "Song A", "artist": "Artist A", "lyrics": "La La"}]
+    }
+    app.db.collection().document().get.return_value = stale_doc
+    app.admission = MagicMock()
+
+    analyzed = {"clean_title": "Song A", "artist": "Artist A", "lyrics": "La La"}
+    analyzed.update(summary="요약문", keywords=["키워드"])
+    app.lease_service.acquire.return_value = {"tracks": [analyzed]}
+
+    response = client.get("/quizdata/test_doc_id_123")
+
+    assert response.status_code == 200
+    assert response.json[0]["summary"] == "요약문"
+    app.nlp_service.analyze.assert_not_called()
+    app.admission.admit.assert_not_called()
+    app.lease_service.release.assert_called_once()
+
+
+def test_debug_profile_requires_token(client, monkeypatch):
+    """/debug/profile 은 토큰이 일치할 때만 collapsed stack 프로파일을 반환하는지 테스트"""
+    from app import config
+
+    monkeypatch.setattr(config, "DEBUG_TOKEN", "secret")
+
+    assert client.get("/debug/profile?seconds=0.1").status_code == 404
+
+    response = client.get(
+        "/debug/profile?seconds=0.1", headers={"X-Debug-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    # 샘플 라인 형식: "스레드;모듈:함수:줄;... 샘플수"
+    line = response.get_data(as_text=True).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_wordcloud_data_caches_term_weights(client, app):
+    """
+    GET /wordcloud/<doc_id>/<title>/data 요청 시 플레이리스트 전체의 단어 가중치를 한 번에 계산하여
+    문서에 캐시하고, 곡 구성이 같으면 재계산 없이 반환하는지 테스트
+    """
+    from firebase_admin import firestore
+
+    doc_ref = app.db.collection().document()
+    songs = [
+        {"clean_title": "Song A", "artist": "Artist A", "lyrics": "사랑 사랑 밤"},
+        {"clean_title": "Song B", "artist": "Artist B", "lyrics": "밤 바다"},
+    ]
+    mock_doc = MagicMock()
+    mock_doc.exists = True
+    # 이전 방식의 곡별 빈도 캐시(wordFreq)가 남아 있는 문서
+    mock_doc.to_dict.return_value = {"tracks": songs, "wordFreq": {"k": {}}}
+    doc_ref.get.return_value = mock_doc
+    app.image_service.playlist_term_weights.return_value = [
+        [["사랑", 2.8], ["밤", 1.0]],
+        [["바다", 1.4], ["밤", 1.0]],
+    ]
+
+    response = client.get("/wordcloud/doc1/Song A/data?top=1")
+
+    assert response.status_code == 200
+    assert response.json["words"] == [["사랑", 2.8]]
+    app.image_service.playlist_term_weights.assert_called_once()
+    (tracks,), _ = app.image_service.playlist_term_weights.call_args
+    assert len(tracks) == 2  # 곡 단위가 아닌 플레이리스트 단위 계산
+    (update,), _ = doc_ref.update.call_args
+    cached = update["termWeights"]
+    assert len(cached["songs"]) == 2
+    assert update["wordFreq"] is firestore.DELETE_FIELD
+
+    # 캐시 적중: 서비스 재호출 없이 반환
+    mock_doc.to_dict.return_value = {"tracks": songs, "termWeights": cached}
+    app.image_service.playlist_term_weights.reset_mock()
+    app.image_service.mask_metadata.return_value = {"grid": 32, "shape": []}
+    response = client.get("/wordcloud/doc1/Song B/data?top=2&mask=true")
+
+    assert response.json["words"] == [["바다", 1.4], ["밤", 1.0]]
+    assert "mask" in response.json
+    app.image_service.playlist_term_weights.assert_not_called()
+
+    # 곡이 추가되면(증분 크롤링) 캐시 무효화 후 재계산
+    songs.append({"clean_title": "Song C", "artist": "C", "lyrics": "별"})
+    app.image_service.playlist_term_weights.return_value = [[], [], [["별", 1.0]]]
+    response = client.get("/wordcloud/doc1/Song C/data")
+
+    assert response.json["words"] == [["별", 1.0]]
+    app.image_service.playlist_term_weights.assert_called_once()
+
+
+def test_quizdata_reads_compressed_lyrics(client, app):
+    """압축 저장된 가사(lyricsZ)도 /quizdata 응답에서는 원문으로 복원되는지 테스트"""
+    from app.utils.lyrics_codec import encode_track
+
+    lyrics = "La La La\n" * 50
+    mock_doc = MagicMock()
+    mock_doc.exists = True
+    mock_doc.to_dict.return_value = {
+        "tracks": [
+            encode_track(
+                {
+                    "clean_title": "Song A",
+                    "artist": "Artist A",
+                    "lyrics": lyrics,
+                    "summary": "요약문",
+                    "keywords": ["키워드"],
+                }
+            )
+        ]
+    }
+    app.db.collection().document().get.return_value = mock_doc
+
+    response = client.get("/quizdata/test_doc_id_123")
+
+    assert response.status_code == 200
+    assert response.json[0]["lyrics"] == lyrics
+    app.nlp_service.analyze.assert_not_called()
+
+
+def test_quizbundle_single_read_with_hints(client, app):
+    """
+    GET /quizbundle 요청 시 문서 1회 조회로 문항과 힌트를 구성하고,
+    생성된 워드클라우드 URL이 있으면 재사용, 없으면 단어 가중치를 포함해 gzip으로 응답하는지 테스트
+    """
+    import gzip
+    from app.utils.text_utils import track_key
+
+    songs = [
+        {
+            "clean_title": title,
+            "artist": "Artist",
+            "lyrics": "La La La",
+            "summary": "요약문",
+            "keywords": ["키워드"],
+        }
+        for title in ("Song A", "Song B")
+    ]
+    doc_ref = app.db.collection().document()
+    mock_doc = MagicMock()
+    mock_doc.exists = True
+    mock_doc.to_dict.return_value = {
+        "tracks": songs,
+        "wordcloudUrl": {track_key(songs[0]): "https://storage/a.png"},
+    }
+    doc_ref.get.return_value = mock_doc
+    doc_ref.get.reset_mock()
+    app.image_service.playlist_term_weights.side_effect = lambda tracks, top_n: [
+        [["la", 3.0]] for _ in tracks
+    ]
+
+    response = client.get(
+        "/quizbundle/doc1?choices=0", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    quiz = json.loads(gzip.decompress(response.data))["quiz"]
+    assert quiz[0]["hint"] == {"wordcloud_url": "https://storage/a.png"}
+    assert quiz[1]["hint"] == {"words": [["la", 3.0]]}
+    doc_ref.get.assert_called_once()
+    app.image_service.playlist_term_weights.assert_called_once()
+    app.nlp_service.analyze.assert_not_called()
+
+
+def test_crawl_batch_dedupes_playlists(client, app):
+    """
+    POST /crawl/batch 요청 시 중복 플레이리스트는 한 번만 넘기고,
+    URL별 doc_id와 전체/고유 곡 수를 반환하는지 테스트
+    """
+    app.music_service.fetch_and_save_playlists.side_effect = lambda reqs, ip, **kw: {
+        "docs": dict(reqs),
+        "totalTracks": 60,
+        "uniqueTracks": 45,
+    }
+    urls = [
+        "https://open.spotify.com/playlist/AAA",
+        "https://open.spotify.com/playlist/BBB?si=x",
+        "https://open.spotify.com/playlist/AAA",
+    ]
+
+    response = client.post("/crawl/batch", json={"playlist_urls": urls})
+
+    assert response.status_code == 200
+    (requests_by_playlist, _), _ = app.music_service.fetch_and_save_playlists.call_args
+    assert list(requests_by_playlist) == ["AAA", "BBB"]
+    doc_ids = [r["doc_id"] for r in response.json["results"]]
+    assert doc_ids[0] == doc_ids[2] and doc_ids[0].startswith("AAA_")
+    assert response.json["uniqueTracks"] == 45
+
+    bad = client.post("/crawl/batch", json={"playlist_urls": ["not a url"]})
+    assert bad.status_code == 400
+
+
+def test_crawl_quota_uses_forwarded_client_ip(client, app):
+    """프록시 뒤에서도 X-Forwarded-For의 클라이언트 IP별로 crawl 할당량을 적용하는지 테스트"""
+    from app.utils.admission import AdmissionController
+
+    app.admission = AdmissionController({"crawl": (4, 0, 1)}, client_max_inflight=1)
+    # 백그라운드 수집이 끝나지 않은 상태 (on_settled 미호출 → 슬롯 유지)
+    app.music_service.fetch_and_save_playlist.side_effect = (
+        lambda playlist_id, request_id, client_ip, on_settled=None: request_id
+    )
+    payload = json.dumps({"playlist_url": "http://spotify.com/playlist/123"})
+
+    def crawl(ip):
+        return client.post(
+            "/crawl",
+            data=payload,
+            content_type="application/json",
+            headers={"X-Forwarded-For": ip},
+        )
+
+    # 같은 프록시를 거쳐도 서로 다른 클라이언트는 각자의 할당량을 가짐
+    assert crawl("203.0.113.1").status_code == 200
+    assert crawl("198.51.100.2").status_code == 200
+    # 같은 클라이언트의 두 번째 요청만 거절
+    assert crawl("203.0.113.1").status_code == 429
+    client_ips = [
+        c.args[2] for c in app.music_service.fetch_and_save_playlist.call_args_list
+    ]
+    assert client_ips == ["203.0.113.1", "198.51.100.2"]
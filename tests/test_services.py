@@ -29,7 +29,7 @@ def test_process_single_track_logic(mocker):
     # Genius 검색 결과 Mocking
     mock_song = MagicMock()
     mock_song.lyrics = "Song Title Lyrics\n[Verse 1]\nHello world"
-    service.genius.search_song.return_value = mock_song
+    service.genius.find_song.return_value = mock_song
 
     # Spotify에서 받은 샘플 데이터 (Input)
     sample_item = {
@@ -52,3 +52,718 @@ def test_process_single_track_logic(mocker):
     assert "Song Title Lyrics" not in result["lyrics"]  # 헤더 삭제 확인
     assert "[Verse 1]" not in result["lyrics"]  # 태그 삭제 확인
     assert "Hello world" in result["lyrics"]  # 본문 유지 확인
+    # 검색어 조합마다 재검색하지 않고 한 번만 호출
+    service.genius.find_song.assert_called_once()
+
+
+def test_crawl_persists_tracks_incrementally_within_deadline():
+    """
+    문서를 먼저 만들고 곡이 끝날 때마다 저장하며(crawlState 갱신),
+    시간 예산을 넘긴 곡은 응답 후 백그라운드에서 저장되는지 테스트
+    """
+    import threading
+
+    mock_db = MagicMock()
+    service = MusicDataService(mock_db, crawl_deadline=0.2)
+    service.sp = MagicMock()
+    service.genius = MagicMock()
+    items = [
+        {"track": {"id": f"id-{name}", "name": name, "artists": [{"name": "Artist"}]}}
+        for name in ("Fast", "Slow")
+    ]
+    service.sp.playlist_items.return_value = {"items": items, "next": None}
+
+    release = threading.Event()
+    finished = threading.Event()
+    settled = threading.Event()
+
+    def fake_process(item):
+        if item["track"]["name"] == "Slow":
+            release.wait(5)  # Genius 429 백오프 중인 곡
+        return {"clean_title": item["track"]["name"], "artist": "Artist", "lyrics": ""}
+
+    service._process_single_track = fake_process
+    doc_ref = mock_db.collection().document()
+    updates = []
+
+    def record(update):
+        updates.append(update)
+        if "crawlStatus" in update:
+            finished.set()
+
+    doc_ref.update.side_effect = record
+
+    assert (
+        service.fetch_and_save_playlist("pl", "req", "ip", on_settled=settled.set)
+        == "req"
+    )
+
+    saved = doc_ref.set.call_args[0][0]
+    assert saved["tracks"] == [] and saved["crawlStatus"] == "running"
+    assert saved["crawlState"]["pending"] == ["id-Fast", "id-Slow"]
+    assert set(saved["crawlItems"]) == {"id-Fast", "id-Slow"}
+    # 응답 시점에는 Fast만 저장됨, Slow는 아직 수집 중이므로 crawl 슬롯도 유지
+    assert len(updates) == 1 and "tracks" in updates[0]
+    assert not settled.is_set()
+
+    release.set()
+    assert finished.wait(5)
+    # 최종 상태는 모든 곡 저장 후 별도로 기록
+    assert len(updates) == 3 and "tracks" in updates[1]
+    assert updates[2] == {"crawlStatus": "complete"}
+    assert settled.wait(5)
+
+
+def test_crawl_heartbeat_refreshes_while_track_in_flight():
+    """곡 하나가 오래 걸려도 수집 중인 동안 heartbeat가 주기적으로 갱신되는지 테스트"""
+    import threading
+
+    service = MusicDataService(MagicMock())
+    service.HEARTBEAT_INTERVAL = 0.05
+    release = threading.Event()
+
+    def slow_process(item):
+        release.wait(5)  # Genius 재시도/백오프로 오래 걸리는 곡
+        return None
+
+    service._process_single_track = slow_process
+    doc_ref = MagicMock()
+    beats = threading.Event()
+    updates = []
+
+    def record(update):
+        updates.append(update)
+        if sum(u.keys() == {"crawlState.heartbeat"} for u in updates) >= 2:
+            beats.set()
+
+    doc_ref.update.side_effect = record
+    settled = threading.Event()
+
+    assert service._run_crawl(
+        [(doc_ref, {"id": {"track": {"id": "id"}}})],
+        0,
+        deadline=0,
+        on_settled=settled.set,
+    )
+    assert beats.wait(5)  # 곡이 끝나지 않았는데도 heartbeat만 따로 기록됨
+
+    release.set()
+    assert settled.wait(5)
+    assert {"crawlStatus": "complete"} in updates
+
+
+def test_resume_crawl_processes_only_unfinished_tracks():
+    """재개 시 pending(및 retry_failed면 failed) 곡만 다시 수집하는지 테스트"""
+    import time
+
+    mock_db = MagicMock()
+    transaction = mock_db.transaction.return_value
+    transaction._max_attempts = 1
+    service = MusicDataService(mock_db)
+    service.genius = MagicMock()
+    items = {
+        tid: {"track": {"id": tid, "name": tid, "artists": [{"name": "A"}]}}
+        for tid in ("done", "pending", "failed")
+    }
+    doc = MagicMock()
+    doc.exists = True
+    doc.to_dict.return_value = {
+        "crawlItems": items,
+        "crawlState": {
+            "pending": ["pending"],
+            "done": ["done"],
+            "failed": ["failed"],
+            "heartbeat": 0,  # 오래전에 중단된 크롤링
+        },
+        "crawlStatus": "running",
+    }
+    mock_db.collection().document().get.return_value = doc
+
+    processed = []
+    service._process_single_track = lambda item: processed.append(item["track"]["id"])
+
+    assert service.resume_crawl("doc") == "doc"
+    assert processed == ["pending"]
+    # 선점(heartbeat 갱신)은 상태 확인과 같은 트랜잭션에서 기록
+    claim = transaction.update.call_args[0][1]
+    assert claim["crawlStatus"] == "running"
+
+    processed.clear()
+    service.resume_crawl("doc", retry_failed=True)
+    assert sorted(processed) == ["failed", "pending"]
+
+    # 다른 인스턴스가 방금 선점했다면(heartbeat 최신) 수집하지 않음
+    processed.clear()
+    transaction.update.reset_mock()
+    doc.to_dict.return_value["crawlState"]["heartbeat"] = time.time()
+    assert service.resume_crawl("doc") == "doc"
+    assert processed == []
+    transaction.update.assert_not_called()
+
+
+def test_batch_crawl_fetches_shared_tracks_once():
+    """여러 플레이리스트에 겹치는 곡은 한 번만 수집하고, 각 플레이리스트 문서에 모두 저장하는지 테스트"""
+    import threading
+
+    mock_db = MagicMock()
+    service = MusicDataService(mock_db)
+    service.sp = MagicMock()
+    service.genius = MagicMock()
+
+    def item(track_id):
+        return {"track": {"id": track_id, "name": track_id, "artists": [{"name": "A"}]}}
+
+    playlists = {"p1": ["shared", "only1"], "p2": ["shared", "only2"]}
+    # 두 플레이리스트의 Spotify 조회가 동시에 진행되어야 통과 (순차 조회면 타임아웃 → 실패 처리)
+    fetching = threading.Barrier(2, timeout=5)
+
+    def playlist_items(pid):
+        fetching.wait()
+        return {"items": [item(t) for t in playlists[pid]], "next": None}
+
+    service.sp.playlist_items.side_effect = playlist_items
+    processed = []
+
+    def fake_process(item):
+        processed.append(item["track"]["id"])
+        return {"clean_title": item["track"]["id"], "artist": "A", "lyrics": ""}
+
+    service._process_single_track = fake_process
+    doc_refs = {"r1": MagicMock(), "r2": MagicMock()}
+    mock_db.collection.return_value.document.side_effect = lambda rid: doc_refs[rid]
+
+    result = service.fetch_and_save_playlists({"p1": "r1", "p2": "r2"}, "ip")
+
+    assert result == {
+        "docs": {"p1": "r1", "p2": "r2"},
+        "totalTracks": 4,
+        "uniqueTracks": 3,
+    }
+    assert sorted(processed) == ["only1", "only2", "shared"]
+    for doc_ref in doc_refs.values():
+        updates = [c.args[0] for c in doc_ref.update.call_args_list]
+        assert len(updates) == 3  # 공유 곡 + 고유 곡 + 최종 상태
+        assert updates[-1] == {"crawlStatus": "complete"}
+
+
+def test_best_hit_scores_title_and_artist_variants():
+    """검색 결과 중 한글/로마자 병기, feat. 표기가 달라도 원곡을 고르고 번역 페이지는 피하는지 테스트"""
+    from app.services.genius_client import best_hit
+
+    def hit(title, artist, state="complete"):
+        return {
+            "title": title,
+            "primary_artist": {"name": artist},
+            "artist_names": artist,
+            "lyrics_state": state,
+            "url": f"https://genius.com/{title}",
+        }
+
+    hits = [
+        hit("Gangnam Style (English Translation)", "Genius English Translations"),
+        hit("Gentleman", "PSY (싸이)"),
+        hit("강남스타일 (Gangnam Style)", "PSY (싸이)"),
+    ]
+    titles = ["Gangnam Style", "Gangnam Style (feat. Guest)"]
+    assert best_hit(hits, titles, ["PSY"])["title"] == "강남스타일 (Gangnam Style)"
+    assert (
+        best_hit(hits, ["Dynamite"], ["BTS"]) is None
+    )  # 맞는 곡이 없으면 가져오지 않음
+    assert (
+        best_hit([hit("Dynamite", "BTS", state="unreleased")], ["Dynamite"], ["BTS"])
+        is None
+    )
+    # 제목이 같아도 가수가 다른 동명곡은 가져오지 않음
+    assert best_hit([hit("Stay", "Justin Bieber")], ["Stay"], ["BLACKPINK"]) is None
+    assert best_hit([hit("STAY", "BLACKPINK (블랙핑크)")], ["Stay"], ["BLACKPINK"])
+
+
+def test_lyrics_index_shards_postings_and_commits_catalog_last():
+    """
+    포스팅은 곡 키 기준 샤드 문서에 먼저 저장하고 카탈로그는 마지막에 저장하며,
+    검색 시 샤드 문서와 샤딩 이전 문서를 합쳐 읽는지 테스트
+    """
+    from app.services.search_service import LyricsSearchService
+    from app.utils.text_utils import song_key
+
+    mock_db = MagicMock()
+    # 문서 참조를 (컬렉션, 문서 ID) 튜플로 흉내
+    mock_db.collection.side_effect = lambda name: MagicMock(
+        document=lambda doc_id: (name, doc_id)
+    )
+    written = []
+    mock_db.batch.return_value.set.side_effect = lambda ref, data, merge: (
+        written.append(ref)
+    )
+    mock_db.get_all.return_value = []  # 아직 색인된 곡 없음
+    service = LyricsSearchService(mock_db)
+
+    track = {"clean_title": "T", "artist": "A", "lyrics": "오빤 강남스타일"}
+    assert service.index_tracks([track]) == 1
+
+    shard = service._shard(song_key("T", "A"))
+    assert written[-1] == ("lyrics_catalog", song_key("T", "A"))
+    assert all(
+        name == "lyrics_ngram_index" and doc_id.endswith(f"_{shard}")
+        for name, doc_id in written[:-1]
+    )
+
+    def snapshot(doc_id, data):
+        return MagicMock(id=doc_id, exists=True, to_dict=lambda: data)
+
+    def get_all(refs):
+        for name, doc_id in refs:
+            if name == "lyrics_catalog":
+                yield snapshot(doc_id, {"title": doc_id, "artist": "A"})
+            elif doc_id == "강남_3":
+                yield snapshot(doc_id, {"songs": {"new": 1}})
+            elif doc_id == "강남":  # 샤딩 이전에 저장된 포스팅
+                yield snapshot(doc_id, {"songs": {"old": 1}})
+
+    mock_db.get_all.side_effect = get_all
+    results = service.search("강남")
+    assert sorted(r["title"] for r in results) == ["new", "old"]
+
+
+def test_char_ngrams_ignores_spacing():
+    """띄어쓰기/대소문자가 달라도 동일한 n-gram이 생성되는지 테스트"""
+    from app.utils.text_utils import char_ngrams
+
+    assert char_ngrams("오빤 강남 스타일") == char_ngrams("오빤강남스타일")
+    assert char_ngrams("강남") == ["강남"]  # 한글은 bigram
+    assert char_ngrams("Sexy Lady") == char_ngrams("sexylady")
+    assert "sex" in char_ngrams("Sexy Lady")  # 라틴 문자는 trigram
+
+
+def test_quiz_service_similarity_matrix():
+    """유사도 행렬이 한 번의 행렬 연산으로 곡 간 유사도를 계산하는지 테스트"""
+    from app.services.quiz_service import QuizService
+
+    tracks = [
+        {"lyrics": "love you baby tonight"},
+        {"lyrics": "love you baby forever"},
+        {"lyrics": "rain falls on the city"},
+    ]
+    sim = QuizService().similarity_matrix(tracks)
+
+    assert sim.shape == (3, 3)
+    assert sim[0, 1] > sim[0, 2]  # 가사가 겹치는 곡이 더 유사
+    assert sim[0, 0] == -1.0  # 자기 자신은 보기에서 제외되도록 마스킹
+
+
+def test_quiz_service_caches_catalog_choices():
+    """카탈로그 보충 후보는 곡당 한 번만 검색하고, 이후에는 캐시(choiceCache.catalog)를 재사용하는지 테스트"""
+    from app.services.quiz_service import QuizService
+
+    search_service = MagicMock()
+    search_service.search.return_value = [
+        {"title": "Solo"},
+        {"title": "Other A"},
+        {"title": "Other B"},
+    ]
+    service = QuizService(search_service=search_service)
+    song = {"clean_title": "Solo", "artist": "A", "keywords": ["키워드"]}
+    catalog = {}
+
+    first = service.build_choices(song, {}, 3, use_catalog=True, catalog=catalog)
+    second = service.build_choices(song, {}, 3, use_catalog=True, catalog=catalog)
+
+    assert sorted(first) == sorted(second) == ["Other A", "Other B", "Solo"]
+    assert list(catalog.values()) == [["Other A", "Other B"]]
+    search_service.search.assert_called_once()
+
+
+def test_batch_run_resumes_from_checkpoint(tmp_path):
+    """일괄 처리 CLI가 체크포인트에 기록된 항목은 건너뛰고 남은 항목만 처리하는지 테스트"""
+    import concurrent.futures
+    from app import batch
+
+    checkpoint = tmp_path / "ckpt.jsonl"
+    checkpoint.write_text('{"key": "a", "result": {"lyrics": "done"}}\n')
+
+    songs = [
+        {"clean_title": "A", "artist": "X", "lyrics": "done"},
+        {"clean_title": "B", "artist": "X", "lyrics": "Title Lyrics\n[Verse]\nHello"},
+    ]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    submitted = []
+
+    def submit(song):
+        submitted.append(song["clean_title"])
+        return executor.submit(batch._process_song, song)
+
+    results = batch.run(songs, ["a", "b"], submit, executor, str(checkpoint))
+
+    assert submitted == ["B"]  # 완료된 A는 다시 처리하지 않음
+    assert results["b"]["lyrics"] == "Hello"
+    assert len(checkpoint.read_text().splitlines()) == 2  # B 결과가 즉시 기록됨
+
+
+def test_batch_playlist_resumes_partial_crawl_and_merges_analysis(tmp_path):
+    """일괄 처리 playlists 모드가 partial 문서를 이어서 수집하고, 분석은 임대/병합 경로로 저장하는지 테스트"""
+    from app import batch
+
+    app = MagicMock()
+    track = {"clean_title": "A", "artist": "X", "lyrics": "hello"}
+    doc_ref = app.db.collection.return_value.document.return_value
+    doc_ref.get.return_value.to_dict.return_value = {"crawlStatus": "complete"}
+
+    def resume(doc_id, on_settled=None):
+        on_settled()
+        return doc_id
+
+    app.music_service.resume_crawl.side_effect = resume
+    app.lease_service.acquire.return_value = {"tracks": [track]}
+    app.nlp_service.analyze.return_value = {"summary": "s", "keywords": ["k"]}
+
+    result = batch._crawl_playlist(
+        app, "pl", previous={"doc_id": "pl_old", "crawlStatus": "partial"}, analyze=True
+    )
+
+    assert result == {
+        "playlist_id": "pl",
+        "doc_id": "pl_old",
+        "crawlStatus": "complete",
+    }
+    app.music_service.fetch_and_save_playlist.assert_not_called()  # 새 문서를 만들지 않음
+    merged = app.lease_service.merge_analysis.call_args.args[1]
+    assert list(merged.values()) == [{"summary": "s", "keywords": ["k"]}]
+    app.lease_service.release.assert_called_once()
+
+    # partial로 기록된 항목은 체크포인트에 있어도 다시 제출됨
+    import concurrent.futures
+
+    checkpoint = tmp_path / "ckpt.jsonl"
+    checkpoint.write_text(
+        '{"key": "pl", "result": {"doc_id": "pl_old", "crawlStatus": "partial"}}\n'
+        '{"key": "done", "result": {"doc_id": "d", "crawlStatus": "complete"}}\n'
+    )
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    submitted = []
+
+    def submit(pid):
+        submitted.append(pid)
+        return executor.submit(lambda: {"crawlStatus": "complete"})
+
+    results = batch.run(
+        ["pl", "done"],
+        ["pl", "done"],
+        submit,
+        executor,
+        str(checkpoint),
+        is_done=lambda r: r.get("crawlStatus") == "complete",
+    )
+    assert submitted == ["pl"]
+    assert results["pl"]["crawlStatus"] == "complete"
+
+
+def test_mask_asset_is_memory_mapped(tmp_path):
+    """마스크 에셋이 없으면 생성하고, 읽기 전용 메모리 맵으로 로드하는지 테스트"""
+    import numpy as np
+    from app.services.image_service import load_mask_asset, MASK_SIZE
+
+    asset_path = tmp_path / "mask.npy"
+    mask = load_mask_asset("app/static/mask_image.png", str(asset_path))
+
+    assert asset_path.exists()
+    assert isinstance(mask, np.memmap)
+    assert mask.shape[:2] == MASK_SIZE
+    assert not mask.flags.writeable
+
+
+def test_playlist_term_weights_and_mask_metadata():
+    """플레이리스트 TF-IDF 가중치(모든 곡에 흔한 단어는 낮게)와 축소 마스크 메타데이터 테스트"""
+    import numpy as np
+    from app.services.image_service import ImageService
+
+    service = ImageService(bucket_name=None)
+    tracks = [
+        {"clean_title": "T1", "artist": "A", "lyrics": "love love night night"},
+        {"clean_title": "T2", "artist": "A", "lyrics": "love love rain"},
+        {"clean_title": "T3", "artist": "A", "lyrics": ""},
+    ]
+    first, second, empty = service.playlist_term_weights(tracks, top_n=5)
+
+    # 같은 빈도라도 플레이리스트 전체에 흔한 "love"보다 이 곡에만 있는 "night"가 우선
+    assert [w for w, _ in first] == ["night", "love"]
+    assert dict(first)["night"] > dict(first)["love"]
+    assert [w for w, _ in second] == ["love", "rain"]
+    assert empty == []
+    assert service.playlist_term_weights(tracks, top_n=1)[0] == first[:1]
+    assert service._getFrequencyDict("love love night") == {"love": 2, "night": 1}
+
+    meta = service.mask_metadata(grid=8)
+    assert meta["grid"] == 8
+    assert len(meta["shape"]) == 8 and all(len(row) == 8 for row in meta["shape"])
+    assert service.mask_metadata(grid=8) is meta  # 캐시 재사용
+    assert service.mask_metadata(grid=4)["grid"] == 4  # grid별 캐시
+
+    # 흑백(2차원) 마스크도 지원
+    service.mask = np.full((16, 16), 255, dtype=np.uint8)
+    service.mask[:8] = 0
+    service._mask_metadata = {}
+    gray = service.mask_metadata(grid=2)
+    assert gray["shape"] == ["11", "00"]
+    assert gray["colors"][0] == ["#000000", "#000000"]
+
+
+def test_lyrics_codec_roundtrip_and_legacy():
+    """압축 저장된 가사가 원문으로 복원되고, 기존 비압축 문서는 그대로 읽히는지 테스트"""
+    from app.utils.lyrics_codec import encode_tracks, decode_playlist, has_lyrics
+
+    lyrics = "오빤 강남스타일\n" * 40
+    stored = encode_tracks([{"clean_title": "A", "lyrics": lyrics}, {"lyrics": "짧음"}])
+
+    assert "lyrics" not in stored[0] and len(stored[0]["lyricsZ"]) < len(lyrics)
+    assert stored[1] == {"lyrics": "짧음"}  # 짧은 가사는 원문 저장
+    assert has_lyrics(stored[0])
+
+    data = decode_playlist({"tracks": stored + [{"lyrics": "legacy"}]})
+    assert [t["lyrics"] for t in data["tracks"]] == [lyrics, "짧음", "legacy"]
+    assert "lyricsZ" not in data["tracks"][0]
+
+
+def test_model_router_respects_length_and_latency_slo():
+    """가사 길이/반복도로 경로를 고르고, p95가 SLO를 넘는 모델은 피하는지 테스트"""
+    import time
+    from app.utils.model_router import ModelRouter
+
+    router = ModelRouter(
+        {
+            "fast": {"model": "lite", "max_output_tokens": 512},
+            "standard": {"model": "lite", "max_output_tokens": 1024},
+            "quality": {"model": "pro", "max_output_tokens": 1024},
+        },
+        slo_seconds=5,
+        short_chars=100,
+        long_chars=1000,
+    )
+    long_lyrics = "\n".join(f"line {i} of a long song" for i in range(100))
+
+    assert router.choose("짧은 가사") == "fast"
+    assert router.choose("후렴 반복\n" * 100) == "fast"  # 반복적인 가사
+    assert router.choose(long_lyrics) == "quality"
+
+    # 상위 모델 지연(공급자 장애) → 기본 경로로 전환
+    for _ in range(10):
+        router.tracker.record("pro", 12.0)
+    assert router.choose(long_lyrics) == "standard"
+
+    # 모든 모델이 SLO 초과 → p95가 가장 낮은 경로
+    for _ in range(10):
+        router.tracker.record("lite", 7.0)
+    assert router.choose(long_lyrics) == "standard"
+    assert ModelRouter.compact_lyrics("a\nb\na\nb") == "a\nb"
+
+    # 빠르게 실패하는 모델은 SLO 초과 지연으로 기록되어 빠른 모델로 보이지 않음
+    failing = ModelRouter(router.routes, slo_seconds=5)
+    for _ in range(10):
+        failing.record("quality", time.monotonic(), ok=False)
+    assert failing.tracker.p95("pro") == 10
+
+
+def test_model_router_recovers_after_samples_expire():
+    """SLO 초과로 제외된 모델도 지연 표본이 만료되면 다시 선택되는지 테스트"""
+    from app.utils.model_router import LatencyTracker, ModelRouter
+
+    now = [0.0]
+    router = ModelRouter(
+        {
+            "standard": {"model": "lite", "max_output_tokens": 1024},
+            "quality": {"model": "pro", "max_output_tokens": 1024},
+        },
+        slo_seconds=5,
+        short_chars=10,
+        long_chars=100,
+        tracker=LatencyTracker(max_age=60, clock=lambda: now[0]),
+    )
+    long_lyrics = "\n".join(f"line {i} of a long song" for i in range(20))
+
+    for _ in range(10):
+        router.tracker.record("pro", 12.0)
+    assert router.choose(long_lyrics) == "standard"
+
+    # 공급자 장애가 끝난 뒤 표본이 만료되면 상위 모델을 다시 시도
+    now[0] = 61.0
+    assert router.choose(long_lyrics) == "quality"
+    assert router.tracker.snapshot()["pro"] == {"p95": None, "samples": 0}
+
+
+def test_nlp_service_records_analysis_route():
+    """분석 결과에 사용된 경로/모델이 함께 반환되고 지연 시간이 기록되는지 테스트"""
+    from app.services.nlp_service import NLPService
+
+    service = NLPService()
+    service.client = MagicMock()
+    parsed = MagicMock(summary="요약", keywords=["k"])
+    service.client.models.generate_content.return_value = MagicMock(parsed=parsed)
+
+    result = service.analyze("짧은 가사", title="T")
+
+    assert result["summary"] == "요약" and result["keywords"] == ["k"]
+    assert result["analysisRoute"]["route"] == "fast"
+    kwargs = service.client.models.generate_content.call_args.kwargs
+    assert kwargs["model"] == result["analysisRoute"]["model"]
+    assert service.router.tracker.snapshot()[kwargs["model"]]["samples"] == 1
+    assert kwargs["config"].thinking_config.thinking_budget == 0
+    assert service.process_lyrics("짧은 가사") == ("요약", ["k"])
+
+    # 상위 모델 경로는 사고 토큰 예산만큼 출력 상한이 늘어남
+    quality = service.router.routes["quality"]
+    assert quality["max_output_tokens"] > quality["thinking_budget"] > 0
+
+
+def test_korean_normalizer_merges_particles():
+    """조사/어미가 붙은 한국어 단어가 같은 어간으로 집계되는지 테스트"""
+    from app.utils.korean_normalizer import normalize_korean
+
+    assert {
+        normalize_korean(w) for w in ["사랑을", "사랑이", "사랑해", "사랑해요"]
+    } == {"사랑"}
+    assert normalize_korean("아이") == "아이"  # 어간이 너무 짧으면 유지
+    assert normalize_korean("사나이") == "사나이"  # 예외 명사
+    assert normalize_korean("love") == "love"  # 한글이 아니면 그대로
+
+
+def test_admission_controller_sheds_load():
+    """슬롯/대기열/클라이언트 한도를 넘으면 429, 503으로 즉시 거절하는지 테스트"""
+    from app.utils.admission import AdmissionController, AdmissionRejected
+
+    admission = AdmissionController({"crawl": (1, 0, 0.1)}, client_max_inflight=1)
+
+    with admission.admit("crawl", "1.1.1.1"):
+        # 같은 클라이언트의 두 번째 요청 → 429
+        with pytest.raises(AdmissionRejected) as e:
+            with admission.admit("crawl", "1.1.1.1"):
+                pass
+        assert e.value.status == 429
+
+        # 다른 클라이언트지만 슬롯/대기열이 가득 참 → 503 + Retry-After
+        with pytest.raises(AdmissionRejected) as e:
+            with admission.admit("crawl", "2.2.2.2"):
+                pass
+        assert e.value.status == 503
+        assert e.value.retry_after >= 1
+
+    # 슬롯 반납 후에는 다시 허용
+    with admission.admit("crawl", "2.2.2.2"):
+        pass
+
+    # hold: 반납 함수를 호출할 때까지 점유, 중복 호출해도 한 번만 반납
+    release = admission.hold("crawl", "1.1.1.1")
+    with pytest.raises(AdmissionRejected):
+        admission.hold("crawl", "2.2.2.2")
+    release()
+    release()
+    assert admission.stats()["crawl"]["active"] == 0
+    admission.hold("crawl", "2.2.2.2")()
+
+
+def test_analysis_lease_respects_active_owner():
+    """다른 요청이 보유한 유효 임대는 획득하지 못하고, 만료된 임대는 이어받는지 테스트"""
+    import time
+    from app.services.lease_service import AnalysisLeaseService
+
+    mock_db = MagicMock()
+    transaction = mock_db.transaction.return_value
+    transaction._max_attempts = 1
+    doc_ref = MagicMock()
+    service = AnalysisLeaseService(mock_db)
+
+    # 1. 유효한 임대가 있으면 실패
+    doc_ref.get.return_value.to_dict.return_value = {
+        "analysisLease": {"owner": "other", "expiresAt": time.time() + 30}
+    }
+    assert service.acquire(doc_ref, "me") is None
+    transaction.update.assert_not_called()
+
+    # 2. 만료된 임대는 이어받고, 트랜잭션 안에서 읽은 문서를 반환
+    doc_ref.get.return_value.to_dict.return_value = {
+        "analysisLease": {"owner": "other", "expiresAt": time.time() - 1},
+        "tracks": [{"clean_title": "A", "summary": "요약문"}],
+    }
+    acquired = service.acquire(doc_ref, "me")
+    assert acquired["tracks"][0]["summary"] == "요약문"
+    lease = transaction.update.call_args[0][1]["analysisLease"]
+    assert lease["owner"] == "me"
+
+
+def test_benchmark_suite_runs_offline():
+    """벤치마크 스위트가 외부 API 없이 실행되고 기준선과 비교되는지 테스트"""
+    from benchmarks import run
+
+    assert (
+        run.main(["--scale", "5", "--only", "clean_title", "--threshold", "1e9"]) == 0
+    )
+
+
+def test_slow_request_sampler_records_stacks():
+    """threshold를 넘긴 요청만 스택 샘플과 함께 기록되는지 테스트"""
+    import time
+    from app.utils.profiler import SlowRequestSampler
+
+    sampler = SlowRequestSampler(threshold=0.05, interval=0.005)
+
+    sampler.start_request("quiz.fast")
+    sampler.end_request()
+    sampler.start_request("quiz.slow")
+    time.sleep(0.2)
+    sampler.end_request()
+
+    assert [r["endpoint"] for r in sampler.records] == ["quiz.slow"]
+    assert "test_slow_request_sampler_records_stacks" in sampler.records[0]["stacks"]
+
+    # 유휴 대기 후 들어온 느린 요청도 계속 샘플링됨 (wakeup 유실 없음)
+    for _ in range(3):
+        time.sleep(0.02)
+        sampler.start_request("quiz.slow")
+        time.sleep(0.12)
+        sampler.end_request()
+    assert len(sampler.records) == 4
+    assert all(r["stacks"] for r in sampler.records)
+
+
+def test_pooled_genius_pool_and_parser():
+    """Genius 클라이언트가 워커 수만큼 커넥션 풀을 갖고, 가사 컨테이너만 추출하는지 테스트"""
+    from app.services.genius_client import PooledGenius
+
+    genius = PooledGenius("token", pool_size=16, proxy={"https": "http://proxy:1"})
+    adapter = genius._session.get_adapter("https://genius.com/")
+    assert adapter._pool_maxsize == 16
+    assert genius._session.proxies == {"https": "http://proxy:1"}
+
+    html = (
+        "<html><head><script>var x = '[Chorus]';</script></head><body>"
+        '<div data-lyrics-container="true">[Verse 1]<br/>Hello<br/><i>world</i></div>'
+        "<div>Recommended songs</div></body></html>"
+    )
+    assert PooledGenius.extract_lyrics(html, remove_section_headers=True) == (
+        "Hello\nworld"
+    )
+
+
+def test_batch_wordcloud_uses_server_weights_and_key():
+    """일괄 처리 워드클라우드가 /wordcloud와 같은 플레이리스트 가중치로 생성되고 문서에 URL이 기록되는지 테스트"""
+    from flask import Flask
+    from app import batch
+    from app.utils.text_utils import track_key
+
+    app = Flask(__name__)
+    app.image_service = MagicMock()
+    app.image_service.playlist_term_weights.return_value = [[["hello", 1.0]], []]
+    app.image_service.generate_and_upload.return_value = "https://gcs/wc.png"
+    tracks = [
+        {"clean_title": "A", "artist": "X", "lyrics": "hello"},
+        {"clean_title": "B", "artist": "Y", "lyrics": "world"},
+    ]
+    doc_ref = MagicMock()
+    doc_ref.get.return_value.to_dict.return_value = {"tracks": tracks}
+
+    batch._prewarm_wordclouds(app, doc_ref)
+
+    first = app.image_service.generate_and_upload.call_args_list[0]
+    assert first.args == ("hello", "A", "X")
+    assert first.kwargs == {"weights": [["hello", 1.0]]}
+    updates = doc_ref.update.call_args.args[0]
+    assert updates[f"wordcloudUrl.{track_key(tracks[0])}"] == "https://gcs/wc.png"
+    assert "termWeights" in updates  # 서버가 다시 계산하지 않도록 가중치 캐시도 기록